@@ -6,9 +6,13 @@ import json
 # Local imports
 import schemas
 from mcp_clients import registry as mcp_registry
-from mcp_clients import google_calendar
-from gemini_client import call_gemini_api
+from model_backend import get_backend
 from google.genai import types
+from context_window import ContextWindow
+from response_cache import ResponseCache
+import tracing
+from fastapi.responses import PlainTextResponse
+from surveyor.utils.instrumentation import provider_stats
 
 
 
@@ -17,14 +21,43 @@ app = FastAPI(
     description="An API that uses Gemini to route prompts to MCP clients or answer directly."
 )
 
+# Gemini, or the deterministic local mock with MODEL_BACKEND=mock.
+model_backend = get_backend()
+
+# Caps oversized tool results before they are sent back to Gemini.
+context_window = ContextWindow()
+
+# Answers repeated prompts without calling Gemini or the tools again.
+response_cache = ResponseCache(embed=model_backend.embed)
+
 @app.get("/", tags=["Status"])
 async def read_root():
     """A simple health check endpoint."""
     return {"status": "AI Agent is running"}
 
 
+@app.get("/metrics", tags=["Status"], response_class=PlainTextResponse)
+async def read_metrics():
+    """Prometheus metrics: per-stage latency histograms, token and cache counters."""
+    return PlainTextResponse(tracing.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/v1/providers/report", tags=["Status"])
+async def read_provider_report():
+    """Per provider/domain fetch, parse and extract timings and failure rates."""
+    return provider_stats.report()
+
+
 @app.post("/api/v1/chat", response_model=schemas.ChatResponse, tags=["AI"])
 async def chat_endpoint(request: schemas.ChatRequest):
+    """Traces the request (see `tracing`) and returns the span timings in `debug_info`."""
+    with tracing.trace("chat") as current:
+        response = await handle_chat(request)
+        response.debug_info["trace"] = current.summary()
+        return response
+
+
+async def handle_chat(request: schemas.ChatRequest):
     """
     This is the main "router" endpoint.
     It takes a prompt and orchestrates the full "understand -> execute -> synthesize" flow.
@@ -32,6 +65,13 @@ async def chat_endpoint(request: schemas.ChatRequest):
     print(f"\n--- New Request Received ---")
     print(f"Prompt: '{request.prompt}'")
 
+    cached = response_cache.get(request.prompt)
+    tracing.record_cache("response", cached is not None)
+    if cached:
+        print(f"[Cache] {cached['match']} hit, skipping Gemini and tool calls.")
+        debug_info = {**cached["debug_info"], "cache_hit": cached["match"]}
+        return schemas.ChatResponse(response=cached["response"], debug_info=debug_info)
+
     # 1. First call to Gemini: "Understand"
     # We send the prompt and the list of available tools.
     tools = mcp_registry.gemini_tool_definitions
@@ -50,7 +90,8 @@ async def chat_endpoint(request: schemas.ChatRequest):
 
     print("\n[Step 1] Calling Gemini to 'Understand' (check for tool use)...")
     # This is our mock API call
-    response_step1 = call_gemini_api(payload_step1)
+    with tracing.span("understand"):
+        response_step1 = model_backend.generate(payload_step1)
     
     try:
         # Extract the first part of the response from the (mock) API
@@ -69,13 +110,11 @@ async def chat_endpoint(request: schemas.ChatRequest):
             print(f"Arguments: {tool_args}")
 
             # 3. Execute the tool (call the MCP client)
-            if tool_name in mcp_registry.tool_implementations:
-                tool_function = mcp_registry.tool_implementations[tool_name]
-                
-                # Call the actual Python function with the arguments
-                # The `**tool_args` syntax unpacks the dict into keyword arguments
+            if tool_name in mcp_registry.tool_specs:
+                # Call the actual Python function with the arguments, off the
+                # event loop and within the tool's concurrency limit and timeout
                 print(f"[Step 3] Executing MCP client: {tool_name}...")
-                tool_result = tool_function(**tool_args)
+                tool_result = await mcp_registry.run_tool(tool_name, tool_args)
                 print(f"Tool Result: {tool_result}")
 
                 # 4. Second call to Gemini: "Synthesize"
@@ -101,10 +140,12 @@ async def chat_endpoint(request: schemas.ChatRequest):
                     }
                 ]
                 
+                contents_step2, _ = context_window.fit(contents_step2)
                 payload_step2 = {"contents": contents_step2, "tools": tools}
 
                 print("\n[Step 4] Calling Gemini to 'Synthesize' tool result...")
-                response_step2 = call_gemini_api(payload_step2)
+                with tracing.span("synthesize"):
+                    response_step2 = model_backend.generate(payload_step2)
                 
                 final_text = response_step2["candidates"][0]["content"]["parts"][0]["text"]
                 debug_info = {
@@ -129,6 +170,7 @@ async def chat_endpoint(request: schemas.ChatRequest):
             raise HTTPException(status_code=500, detail="Invalid response from Gemini API")
 
         print(f"\nFinal Response: {final_text}")
+        response_cache.put(request.prompt, final_text, debug_info)
         return schemas.ChatResponse(response=final_text, debug_info=debug_info)
 
     except (KeyError, IndexError, TypeError) as e:
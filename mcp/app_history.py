@@ -6,9 +6,13 @@ import json
 
 # Local imports
 import mcp_clients.registry as mcp_registry
-from mcp_clients import google_calendar
-from gemini_client import call_gemini_api
+from model_backend import get_backend
 from google.genai import types
+from context_window import ContextWindow, to_dict
+from response_cache import ResponseCache
+import tracing
+from fastapi.responses import PlainTextResponse
+from surveyor.utils.instrumentation import provider_stats
 
 # --- Pydantic Schemas ---
 # We define the schemas here to include the new history fields.
@@ -43,14 +47,44 @@ app = FastAPI(
     description="An API that uses Gemini to route prompts to MCP clients or answer directly, now with conversational memory."
 )
 
+# Gemini, or the deterministic local mock with MODEL_BACKEND=mock.
+model_backend = get_backend()
+
+# Keeps the contents sent to Gemini within a token budget on long sessions.
+context_window = ContextWindow()
+
+# Answers repeated opening prompts without calling Gemini or the tools again.
+# Only used for fresh sessions: with history the answer depends on context.
+response_cache = ResponseCache(embed=model_backend.embed)
+
 @app.get("/", tags=["Status"])
 async def read_root():
     """A simple health check endpoint."""
     return {"status": "AI Agent is running"}
 
 
+@app.get("/metrics", tags=["Status"], response_class=PlainTextResponse)
+async def read_metrics():
+    """Prometheus metrics: per-stage latency histograms, token and cache counters."""
+    return PlainTextResponse(tracing.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/v1/providers/report", tags=["Status"])
+async def read_provider_report():
+    """Per provider/domain fetch, parse and extract timings and failure rates."""
+    return provider_stats.report()
+
+
 @app.post("/api/v1/chat", response_model=ChatResponse, tags=["AI"])
 async def chat_endpoint(request: ChatRequest):
+    """Traces the request (see `tracing`) and returns the span timings in `debug_info`."""
+    with tracing.trace("chat") as current:
+        response = await handle_chat(request)
+        response.debug_info["trace"] = current.summary()
+        return response
+
+
+async def handle_chat(request: ChatRequest):
     """
     This is the main "router" endpoint with session management.
     It takes a new prompt and the previous conversation history,
@@ -61,6 +95,18 @@ async def chat_endpoint(request: ChatRequest):
     print(f"Prompt: '{request.prompt}'")
     print(f"Received history with {len(request.history)} items.")
 
+    cached = response_cache.get(request.prompt) if not request.history else None
+    if not request.history:
+        tracing.record_cache("response", cached is not None)
+    if cached:
+        print(f"[Cache] {cached['match']} hit, skipping Gemini and tool calls.")
+        updated_history = [
+            {"role": "user", "parts": [{"text": request.prompt}]},
+            {"role": "model", "parts": [{"text": cached["response"]}]},
+        ]
+        debug_info = {**cached["debug_info"], "cache_hit": cached["match"], "history_items_out": len(updated_history)}
+        return ChatResponse(response=cached["response"], updated_history=updated_history, debug_info=debug_info)
+
     # 1. First call to Gemini: "Understand"
     # We send the *full history* plus the *new prompt*.
     tools = mcp_registry.gemini_tool_definitions
@@ -69,8 +115,10 @@ async def chat_endpoint(request: ChatRequest):
     new_user_content = {"role": "user", "parts": [{"text": request.prompt}]}
     
     # This is the history we'll use for the *first* call
-    # It's the old history + the new prompt
-    contents_step1 = request.history + [new_user_content]
+    # It's the old history + the new prompt. Only the payload is compacted to
+    # fit the token budget: the client keeps the full history.
+    history = request.history + [new_user_content]
+    contents_step1, context_stats = context_window.fit(history)
     
     payload_step1 = {
         "contents": contents_step1,
@@ -79,7 +127,8 @@ async def chat_endpoint(request: ChatRequest):
 
     print("\n[Step 1] Calling Gemini to 'Understand' (check for tool use)...")
     # This is our mock API call
-    response_step1 = call_gemini_api(payload_step1)
+    with tracing.span("understand"):
+        response_step1 = model_backend.generate(payload_step1)
     
     try:
         # Extract the model's response (this is a full 'content' object)
@@ -87,7 +136,8 @@ async def chat_endpoint(request: ChatRequest):
         model_content_step1 = response_step1["candidates"][0]["content"]
         response_part = model_content_step1["parts"][0] # Just the first part for checking
 
-        if "function_call" in response_part:
+        # Parts are SDK dumps: both keys are always present, unset ones are None.
+        if response_part.get("function_call") is not None:
             # 2. Gemini wants to call a tool
             print("[Step 2] Gemini requested a tool call.")
             fc = response_part["function_call"]
@@ -98,11 +148,10 @@ async def chat_endpoint(request: ChatRequest):
             print(f"Arguments: {tool_args}")
 
             # 3. Execute the tool (call the MCP client)
-            if tool_name in mcp_registry.tool_implementations:
-                tool_function = mcp_registry.tool_implementations[tool_name]
-                
+            if tool_name in mcp_registry.tool_specs:
+                # Runs off the event loop, within the tool's concurrency limit and timeout
                 print(f"[Step 3] Executing MCP client: {tool_name}...")
-                tool_result = tool_function(**tool_args)
+                tool_result = await mcp_registry.run_tool(tool_name, tool_args)
                 print(f"Tool Result: {tool_result}")
 
                 # 4. Second call to Gemini: "Synthesize"
@@ -122,29 +171,37 @@ async def chat_endpoint(request: ChatRequest):
 
                 # This is the full history *so far*
                 # old_history + user_prompt + model_function_call + tool_result
-                contents_step2 = contents_step1 + [model_content_step1, tool_content]
+                history += [to_dict(model_content_step1), to_dict(tool_content)]
+                contents_step2, context_stats = context_window.fit(history)
                 
                 payload_step2 = {"contents": contents_step2, "tools": tools}
 
                 print("\n[Step 4] Calling Gemini to 'Synthesize' tool result...")
-                response_step2 = call_gemini_api(payload_step2)
+                with tracing.span("synthesize"):
+                    response_step2 = model_backend.generate(payload_step2)
                 
                 # Get the final model response (text)
                 model_content_step2 = response_step2["candidates"][0]["content"]
                 final_text = model_content_step2["parts"][0]["text"]
                 
                 # This is the *complete* history for this turn
-                updated_history = contents_step2 + [model_content_step2]
+                updated_history = history + [to_dict(model_content_step2)]
 
                 debug_info = {
                     "tool_called": tool_name,
                     "tool_args": tool_args,
                     "tool_result": tool_result,
                     "history_items_in": len(request.history),
-                    "history_items_out": len(updated_history)
+                    "history_items_out": len(updated_history),
+                    "context_tokens": context_stats
                 }
                 
                 print(f"\nFinal Response: {final_text}")
+                if not request.history:
+                    response_cache.put(request.prompt, final_text, debug_info)
+                else:
+                    # Still let write tools invalidate stale cached answers.
+                    response_cache.record_tool_call(tool_name)
                 return ChatResponse(
                     response=final_text,
                     updated_history=updated_history,
@@ -156,21 +213,24 @@ async def chat_endpoint(request: ChatRequest):
                 print(f"[Error] Gemini requested unknown tool: {tool_name}")
                 raise HTTPException(status_code=500, detail=f"AI requested unknown tool: {tool_name}")
 
-        elif "text" in response_part:
+        elif response_part.get("text") is not None:
             # 2. No tool needed. Gemini answered directly.
             print("[Step 2] No tool needed. Gemini answered directly.")
             final_text = response_part["text"]
             
             # The full history is just the history + user prompt + model's text response
-            updated_history = contents_step1 + [model_content_step1]
+            updated_history = history + [to_dict(model_content_step1)]
             
             debug_info = {
                 "tool_called": None,
                 "history_items_in": len(request.history),
-                "history_items_out": len(updated_history)
+                "history_items_out": len(updated_history),
+                "context_tokens": context_stats
             }
             
             print(f"\nFinal Response: {final_text}")
+            if not request.history:
+                response_cache.put(request.prompt, final_text, debug_info)
             return ChatResponse(
                 response=final_text,
                 updated_history=updated_history,
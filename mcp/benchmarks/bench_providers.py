@@ -0,0 +1,217 @@
+"""
+Offline benchmark of the surveyor providers: fetch -> parse -> extract.
+
+Every `Provider` subclass has a recorded page in `corpus/providers` (see
+`manifest.json` for the values each extraction must return). The pages are
+served by a local stand-in server, and the pipeline is timed for every mode
+combination:
+
+- fetch:       `requests` (default) or `browser` (headless Firefox, `--browser`)
+- parser:      `html.parser` or `lxml` (when installed)
+- concurrency: `serial` or a thread pool (`--threads`)
+
+A wrong extraction always fails the run. With `--baseline`, throughput is
+compared against a previous run (`--save-baseline`) and the run fails when a
+mode is more than `--tolerance` slower.
+
+Run from the `mcp` directory:
+    python -m benchmarks.bench_providers --page-kb 200 --repeat 5
+    python -m benchmarks.bench_providers --save-baseline .data/bench/providers.json
+    python -m benchmarks.bench_providers --baseline .data/bench/providers.json
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from bs4 import BeautifulSoup
+
+import surveyor.providers as providers
+from surveyor.providers.provider import Provider
+from benchmarks.stand_in_server import StandInServer
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus", "providers")
+
+
+def available_parsers() -> list[str]:
+    parsers = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        parsers.append("lxml")
+    except ImportError:
+        print("lxml is not installed: skipping the lxml parser mode.")
+    return parsers
+
+
+def load_manifest() -> list[dict]:
+    with open(os.path.join(CORPUS_DIR, "manifest.json"), "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+_sessions = threading.local()
+
+
+def fetch_requests(url: str) -> str:
+    # One keep-alive session per worker thread.
+    session = getattr(_sessions, "session", None)
+    if session is None:
+        session = _sessions.session = requests.Session()
+    response = session.get(url)
+    response.raise_for_status()
+    return response.text
+
+
+def fetch_browser(url: str) -> str:
+    return Provider.fetch_using_selenium(url, provider_name="Benchmark")
+
+
+FETCHERS = {"requests": fetch_requests, "browser": fetch_browser}
+
+
+def extract(entry: dict, url: str, soup: BeautifulSoup) -> dict:
+    """Runs the provider's extraction methods on an already parsed page."""
+    cls = getattr(providers, entry["provider"])
+    # Skip the subclass __init__ (URL rewriting): `url` is already the page's.
+    provider = cls.__new__(cls)
+    Provider.__init__(provider, url, cache=False, fetch_mode="benchmark")
+    provider._soup = soup
+    return {
+        "title": provider.get_title(),
+        "doi": provider.get_doi(),
+        "abstract": provider.get_abstract(),
+    }
+
+
+def check(entry: dict, result: dict) -> list[str]:
+    expected = entry["expected"]
+    errors = []
+    if result["title"] != expected["title"]:
+        errors.append(f"title {result['title']!r}")
+    if result["doi"] != expected["doi"]:
+        errors.append(f"doi {result['doi']!r}")
+    if expected["abstract"] not in result["abstract"]:
+        errors.append(f"abstract {result['abstract'][:60]!r}")
+    return errors
+
+
+def run_item(entry: dict, url: str, fetch, parser: str) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    html = fetch(url)
+    timings["fetch"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    soup = BeautifulSoup(html, parser)
+    timings["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        result = extract(entry, url, soup)
+        errors = check(entry, result)
+    except Exception as e:
+        errors = [f"{type(e).__name__}: {e}"]
+    timings["extract"] = time.perf_counter() - start
+    return {"provider": entry["provider"], "timings": timings, "errors": errors}
+
+
+def run_mode(items: list, fetch_mode: str, parser: str, threads: int) -> dict:
+    fetch = FETCHERS[fetch_mode]
+    start = time.perf_counter()
+    if threads <= 1:
+        results = [run_item(entry, url, fetch, parser) for entry, url in items]
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(lambda item: run_item(item[0], item[1], fetch, parser), items))
+    wall = time.perf_counter() - start
+
+    stage_seconds = {"fetch": 0.0, "parse": 0.0, "extract": 0.0}
+    failures = []
+    for result in results:
+        for stage, seconds in result["timings"].items():
+            stage_seconds[stage] += seconds
+        if result["errors"]:
+            failures.append({"provider": result["provider"], "errors": result["errors"]})
+
+    return {
+        "items": len(results),
+        "wall_seconds": round(wall, 4),
+        "items_per_second": round(len(results) / wall, 2) if wall else 0.0,
+        "stage_ms_per_item": {
+            stage: round(seconds / len(results) * 1000, 3) for stage, seconds in stage_seconds.items()
+        },
+        "failures": failures,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for mode, result in results.items():
+        previous = baseline.get(mode)
+        if not previous:
+            continue
+        floor = previous["items_per_second"] * (1 - tolerance)
+        if result["items_per_second"] < floor:
+            regressions.append(
+                f"{mode}: {result['items_per_second']} items/s < {floor:.2f} "
+                f"(baseline {previous['items_per_second']})"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Copies of the corpus per mode.")
+    parser.add_argument("--page-kb", type=int, default=200, help="Pad served pages to this size.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stand-in server latency.")
+    parser.add_argument("--threads", type=int, default=8, help="Workers of the concurrent mode.")
+    parser.add_argument("--browser", action="store_true", help="Also benchmark the selenium fetch.")
+    parser.add_argument("--baseline", help="Fail on regressions against this results file.")
+    parser.add_argument("--save-baseline", help="Write the results to this file.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown (0.2 = 20%%).")
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest()
+    fetch_modes = ["requests"] + (["browser"] if args.browser else [])
+    parser_names = available_parsers()
+    concurrency_modes = {"serial": 1, f"threads{args.threads}": args.threads}
+
+    results = {}
+    with StandInServer(CORPUS_DIR, page_kb=args.page_kb, latency_ms=args.latency_ms) as server:
+        items = [(entry, server.url_for(entry["file"])) for entry in manifest] * args.repeat
+        for fetch_mode in fetch_modes:
+            for parser_name in parser_names:
+                for concurrency, threads in concurrency_modes.items():
+                    mode = f"{fetch_mode}/{parser_name}/{concurrency}"
+                    results[mode] = run_mode(items, fetch_mode, parser_name, threads)
+                    r = results[mode]
+                    print(f"{mode:40s} {r['items_per_second']:8.2f} items/s  "
+                          f"per item (ms): {r['stage_ms_per_item']}")
+
+    exit_code = 0
+    for mode, result in results.items():
+        for failure in result["failures"]:
+            print(f"[FAIL] {mode} {failure['provider']}: {', '.join(failure['errors'])}")
+            exit_code = 1
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"[REGRESSION] {regression}")
+            exit_code = 1
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or ".", exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.save_baseline}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Load test of the chat routers (`app.py`, `app_history.py`) against the mock
+model backend (`model_backend.MockBackend`), so no Gemini quota is used.
+
+For every concurrency level, `--requests` chats are sent by that many
+concurrent virtual users and the run reports throughput, p50/p99 latency and
+the worst event-loop lag (how late a 10 ms timer fired while the router was
+busy). A model call that blocks the event loop shows up as RPS flat across
+levels and a lag close to the mock latency.
+
+- `--tool-ratio` of the prompts make the mock request the `mock_lookup` tool
+  (see `benchmarks.mock_tools`), which goes through the real `ToolRunner`.
+- With `--app app_history`, each virtual user keeps its session history for
+  `--session-turns` turns, so the report also shows latency by turn index
+  (history growth).
+
+The app runs in-process over ASGI by default. With `--url`, requests go to a
+running server instead (start it with `MODEL_BACKEND=mock`; tool calls are
+then disabled, since `mock_lookup` is only registered in-process).
+
+Run from the `mcp` directory:
+    python -m benchmarks.load_chat --latency-ms 200 --concurrency 1,4,16
+    python -m benchmarks.load_chat --app app_history --session-turns 20
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import time
+
+import httpx
+
+CHAT_PATH = "/api/v1/chat"
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def uses_tool(index: int, ratio: float) -> bool:
+    """Deterministically spreads `ratio` of the requests over the run."""
+    return int((index + 1) * ratio) > int(index * ratio)
+
+
+def build_prompt(index: int, tool_ratio: float) -> str:
+    # Unique prompts, so the response cache never answers.
+    prompt = f"Load test question number {index}: summarise record {index}."
+    if uses_tool(index, tool_ratio):
+        prompt += f" [tool:mock_lookup item={index}]"
+    return prompt
+
+
+def load_app(name: str, args):
+    """Imports the router with the mock backend and the stand-in tool."""
+    os.environ["MODEL_BACKEND"] = "mock"
+    os.environ["MOCK_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["MOCK_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["MOCK_TOOL_LATENCY_MS"] = str(args.tool_latency_ms)
+    os.environ.setdefault("GEMINI_API_KEY", "load-test")
+
+    from mcp_clients import registry
+    from benchmarks.mock_tools import MOCK_TOOL_SCHEMA
+    if "mock_lookup" not in registry.tool_specs:
+        registry.register_tool(
+            "mock_lookup", "benchmarks.mock_tools:mock_lookup", MOCK_TOOL_SCHEMA,
+            max_concurrency=args.tool_concurrency, timeout=30,
+        )
+    return importlib.import_module(name).app
+
+
+async def probe_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Worst delay of a periodic timer while the load runs."""
+    worst = 0.0
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, loop.time() - expected)
+    return worst
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, args, first_index: int) -> dict:
+    next_index = first_index
+    last_index = first_index + args.requests
+    latencies: list[float] = []
+    by_turn: dict[int, list[float]] = {}
+    history_items: list[int] = []
+    errors = 0
+
+    async def user():
+        nonlocal next_index, errors
+        history: list = []
+        turn = 0
+        while next_index < last_index:
+            index = next_index
+            next_index += 1
+            body = {"prompt": build_prompt(index, args.tool_ratio)}
+            if args.app == "app_history":
+                body["history"] = history
+            start = time.perf_counter()
+            try:
+                response = await client.post(CHAT_PATH, json=body)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - start
+            if not ok:
+                errors += 1
+                history, turn = [], 0
+                continue
+            latencies.append(elapsed)
+            by_turn.setdefault(turn, []).append(elapsed)
+            if args.app == "app_history":
+                history = response.json()["updated_history"]
+                history_items.append(len(history))
+                turn += 1
+                if turn >= args.session_turns:
+                    history, turn = [], 0
+
+    stop = asyncio.Event()
+    lag_probe = asyncio.create_task(probe_loop_lag(stop)) if args.url is None else None
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    stop.set()
+    loop_lag = await lag_probe if lag_probe else None
+
+    result = {
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 1),
+        "loop_lag_ms": round(loop_lag * 1000, 1) if loop_lag is not None else None,
+    }
+    if args.app == "app_history":
+        result["mean_history_items"] = round(sum(history_items) / len(history_items), 1) if history_items else 0
+        result["p50_ms_by_turn"] = {
+            turn: round(percentile(values, 0.5) * 1000, 1) for turn, values in sorted(by_turn.items())
+        }
+    return result
+
+
+async def run(args) -> list[dict]:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        app = load_app(args.app, args)
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=args.timeout)
+
+    results = []
+    first_index = 0
+    async with client:
+        for concurrency in args.concurrency:
+            # The routers print every step; keep the report readable.
+            sink = io.StringIO() if not args.verbose else None
+            with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+                result = await run_level(client, concurrency, args, first_index)
+            first_index += args.requests
+            results.append(result)
+            lag = f"{result['loop_lag_ms']:8.1f}" if result["loop_lag_ms"] is not None else "     n/a"
+            print(f"c={concurrency:<4d} {result['rps']:8.2f} req/s  p50 {result['p50_ms']:8.1f} ms  "
+                  f"p99 {result['p99_ms']:8.1f} ms  loop lag {lag} ms  errors {result['errors']}")
+            if "p50_ms_by_turn" in result:
+                print(f"       mean history items {result['mean_history_items']}, "
+                      f"p50 ms by turn: {result['p50_ms_by_turn']}")
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=["app", "app_history"], default="app", help="Router module to load.")
+    parser.add_argument("--url", help="Send requests to a running server instead of in-process.")
+    parser.add_argument("--concurrency", default="1,2,4,8,16",
+                        type=lambda value: [int(level) for level in value.split(",")],
+                        help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per concurrency level.")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Mock model latency per call.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra mock model latency.")
+    parser.add_argument("--tool-ratio", type=float, default=0.5, help="Share of prompts calling the tool.")
+    parser.add_argument("--tool-latency-ms", type=float, default=50.0, help="Latency of the stand-in tool.")
+    parser.add_argument("--tool-concurrency", type=int, default=8, help="max_concurrency of the stand-in tool.")
+    parser.add_argument("--session-turns", type=int, default=10, help="Turns per session (app_history).")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--verbose", action="store_true", help="Keep the routers' step logs.")
+    args = parser.parse_args(argv)
+
+    if args.url and args.tool_ratio:
+        print("--url: tool calls disabled (mock_lookup is only registered in-process).")
+        args.tool_ratio = 0.0
+
+    results = asyncio.run(run(args))
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"app": args.app, "latency_ms": args.latency_ms, "levels": results}, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    return 1 if any(result["errors"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
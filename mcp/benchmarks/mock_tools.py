@@ -0,0 +1,28 @@
+"""
+Stand-in MCP tool for the chat load test (`benchmarks.load_chat`).
+
+Registered in-process by the harness, so the mock model's function calls
+exercise the real `ToolRunner` path (thread pool, semaphore, timeout).
+"""
+import os
+import time
+
+MOCK_TOOL_SCHEMA = {
+    "name": "mock_lookup",
+    "description": "Looks up a record by id (load-test stand-in).",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "item": {"type": "integer", "description": "Record id"},
+        },
+        "required": ["item"],
+    },
+}
+
+
+def mock_lookup(item: int) -> dict:
+    """Blocks for `MOCK_TOOL_LATENCY_MS`, like a real API-backed tool."""
+    latency_ms = float(os.getenv("MOCK_TOOL_LATENCY_MS", "0"))
+    if latency_ms:
+        time.sleep(latency_ms / 1000)
+    return {"item": item, "title": f"Record {item}", "summary": "x" * 200}
@@ -0,0 +1,108 @@
+"""
+Local HTTP stand-in for publisher websites.
+
+Serves the recorded pages of a corpus directory on 127.0.0.1, optionally
+padded with filler markup (recorded fixtures are trimmed to the parts the
+providers read; real pages are 100-500 KB) and with an artificial latency,
+so fetch benchmarks run offline and are reproducible.
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER_BLOCK = (
+    '<div class="reference"><span class="authors">A. Author, B. Author</span> '
+    '<a href="https://example.org/ref">A referenced paper title</a> '
+    '<span class="venue">Journal of Examples, 2021</span></div>\n'
+)
+
+
+def pad_html(html: str, page_kb: int) -> str:
+    """Appends filler blocks before `</body>` until the page is ~`page_kb` KB."""
+    missing = page_kb * 1024 - len(html)
+    if missing <= 0:
+        return html
+    filler = FILLER_BLOCK * (missing // len(FILLER_BLOCK) + 1)
+    head, sep, tail = html.rpartition("</body>")
+    if not sep:
+        return html + filler
+    return head + filler + sep + tail
+
+
+class StandInServer:
+    """
+    Background `ThreadingHTTPServer` serving `corpus_dir`.
+
+    Usage:
+        with StandInServer("benchmarks/corpus/providers", page_kb=200) as server:
+            url = server.url_for("acm.html")
+    """
+
+    def __init__(self, corpus_dir: str, page_kb: int = 0, latency_ms: float = 0.0):
+        self.corpus_dir = corpus_dir
+        self.page_kb = page_kb
+        self.latency_ms = latency_ms
+        self._pages: dict[str, bytes] = {}
+        self._httpd = None
+        self._thread = None
+
+    def _load(self, name: str):
+        if name not in self._pages:
+            path = os.path.join(self.corpus_dir, name)
+            if not os.path.isfile(path):
+                return None
+            with open(path, "r", encoding="utf-8") as file:
+                self._pages[name] = pad_html(file.read(), self.page_kb).encode("utf-8")
+        return self._pages[name]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000)
+                body = server._load(self.path.lstrip("/").split("?")[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,194 @@
+"""
+Token-budgeted context window for long chat sessions.
+
+The router resends the whole conversation to Gemini on every call, including
+large raw tool outputs (e.g. Google CSE result lists). This module keeps a
+token estimate per message and, when the conversation grows past the budget,
+compacts it before it is sent:
+
+1.  Tool results in older turns are replaced by a short summary.
+2.  If that is not enough, the oldest turns are dropped (whole turns only, so
+    a function call is never separated from its function response).
+3.  If the current turn alone is still too big, its tool results are truncated.
+
+Token counts are estimated locally (no extra API round trip).
+"""
+import os
+import json
+import base64
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Configuration ---
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "32000"))
+# Number of most recent turns whose tool results are never summarised.
+CONTEXT_KEEP_RECENT_TURNS = int(os.getenv("CONTEXT_KEEP_RECENT_TURNS", "2"))
+# Maximum size of a compacted tool result, in characters.
+TOOL_RESULT_SUMMARY_CHARS = int(os.getenv("TOOL_RESULT_SUMMARY_CHARS", "600"))
+# Rough average for English text / JSON with the Gemini tokenizer.
+CHARS_PER_TOKEN = 4
+
+
+def _json_default(obj):
+    """
+    Lets `json.dumps` handle SDK objects such as `types.Part`, and the bytes
+    of `response.model_dump()` (e.g. `Part.thought_signature`), which are
+    base64-encoded as the SDK expects them back.
+    """
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", exclude_none=True)
+    if isinstance(obj, bytes):
+        return base64.b64encode(obj).decode("ascii")
+    return str(obj)
+
+
+def to_dict(content) -> dict:
+    """Converts a content object (dict or SDK model) into a plain dict."""
+    if isinstance(content, dict):
+        return json.loads(json.dumps(content, default=_json_default))
+    return _json_default(content)
+
+
+def estimate_tokens(content) -> int:
+    """Estimates the number of tokens a content object will cost."""
+    return len(json.dumps(content, default=_json_default)) // CHARS_PER_TOKEN + 1
+
+
+def summarise_tool_result(result, max_chars: int = TOOL_RESULT_SUMMARY_CHARS) -> dict:
+    """
+    Builds a compact, deterministic summary of a tool result.
+
+    Lists keep their length and the first few items, dicts keep their keys,
+    everything is cut to `max_chars` characters of JSON.
+    """
+    summary = {"compacted": True}
+    if isinstance(result, list):
+        summary["item_count"] = len(result)
+    elif isinstance(result, dict):
+        summary["keys"] = list(result.keys())
+        if isinstance(result.get("results"), list):
+            summary["item_count"] = len(result["results"])
+
+    text = json.dumps(result, default=_json_default, ensure_ascii=False)
+    if len(text) > max_chars:
+        text = text[:max_chars] + "...[truncated]"
+    summary["preview"] = text
+    return summary
+
+
+def _has_function_response(content: dict) -> bool:
+    return any(part.get("function_response") for part in content.get("parts", []))
+
+
+def _is_user_prompt(content: dict) -> bool:
+    return content.get("role") == "user" and any(
+        part.get("text") for part in content.get("parts", [])
+    )
+
+
+def _compact_content(content: dict, max_chars: int) -> dict:
+    """Returns a copy of `content` with its function responses summarised."""
+    parts = []
+    for part in content.get("parts", []):
+        fr = part.get("function_response")
+        result = (fr.get("response") or {}).get("result") if fr else None
+        already_compacted = isinstance(result, dict) and result.get("compacted")
+        if fr and not already_compacted:
+            part = {
+                "function_response": {
+                    "name": fr.get("name"),
+                    "response": {"result": summarise_tool_result(result, max_chars)},
+                }
+            }
+        parts.append(part)
+    return {**content, "parts": parts}
+
+
+def split_turns(contents: list[dict]) -> list[list[dict]]:
+    """
+    Groups a flat list of contents into turns.
+
+    A turn starts at a user text prompt and contains everything up to the
+    next one (model function calls, tool results, the final model answer).
+    """
+    turns = []
+    for content in contents:
+        if not turns or _is_user_prompt(content):
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+class ContextWindow:
+    """
+    Enforces a token budget on the contents sent to `call_gemini_api`.
+
+    Usage:
+        window = ContextWindow()
+        contents, stats = window.fit(request.history + [new_user_content])
+    """
+
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        keep_recent_turns: int = CONTEXT_KEEP_RECENT_TURNS,
+        summary_chars: int = TOOL_RESULT_SUMMARY_CHARS,
+    ):
+        self.token_budget = token_budget
+        self.keep_recent_turns = max(1, keep_recent_turns)
+        self.summary_chars = summary_chars
+
+    @staticmethod
+    def _turn_tokens(turn: list[dict]) -> int:
+        return sum(estimate_tokens(content) for content in turn)
+
+    def fit(self, contents: list) -> tuple[list[dict], dict]:
+        """
+        Returns `contents` compacted so that it fits in the token budget, and
+        the stats of the compaction (for debug_info). The window is shared by
+        concurrent requests, so the stats are returned rather than stored.
+        """
+        contents = [to_dict(content) for content in contents]
+        tokens_in = sum(estimate_tokens(content) for content in contents)
+        stats = {
+            "tokens_in": tokens_in,
+            "tokens_out": tokens_in,
+            "compacted_turns": 0,
+            "dropped_turns": 0,
+        }
+        if tokens_in <= self.token_budget:
+            return contents, stats
+
+        turns = split_turns(contents)
+        turn_tokens = [self._turn_tokens(turn) for turn in turns]
+
+        # 1. Summarise tool results of older turns, oldest first.
+        old_turns = max(0, len(turns) - self.keep_recent_turns)
+        for i in range(old_turns):
+            if sum(turn_tokens) <= self.token_budget:
+                break
+            if any(_has_function_response(c) for c in turns[i]):
+                turns[i] = [_compact_content(c, self.summary_chars) for c in turns[i]]
+                turn_tokens[i] = self._turn_tokens(turns[i])
+                stats["compacted_turns"] += 1
+
+        # 2. Drop whole turns from the front, always keeping the current one.
+        while len(turns) > 1 and sum(turn_tokens) > self.token_budget:
+            turns.pop(0)
+            turn_tokens.pop(0)
+            stats["dropped_turns"] += 1
+
+        # 3. The current turn alone is too big: truncate its tool results.
+        if sum(turn_tokens) > self.token_budget:
+            turns[-1] = [_compact_content(c, self.summary_chars) for c in turns[-1]]
+            turn_tokens[-1] = self._turn_tokens(turns[-1])
+            stats["compacted_turns"] += 1
+
+        stats["tokens_out"] = sum(turn_tokens)
+        print(
+            f"  [Context] Compacted history: {tokens_in} -> {stats['tokens_out']} tokens "
+            f"(budget {self.token_budget}, summarised {stats['compacted_turns']}, "
+            f"dropped {stats['dropped_turns']} turns)"
+        )
+        return [content for turn in turns for content in turn], stats
@@ -6,13 +6,21 @@ It loads the API key from a `.env` file for security.
 """
 import os
 import json
+import time
+import hashlib
+import logging
+import threading
 import google.genai as genai
 from dotenv import load_dotenv
 from google.genai import types
 
+import tracing
+
 # Load environment variables from a .env file
 load_dotenv()
 
+logger = logging.getLogger("mcp.gemini")
+
 # --- Load and Configure API Key ---
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
@@ -30,15 +38,113 @@ default_safety_settings = [
     {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
 ]
 
-client = genai.Client(
-    api_key=GEMINI_API_KEY
-)
+# The client is created on first use so importing this module (and starting
+# the server) stays fast.
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> genai.Client:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = genai.Client(
+                    api_key=GEMINI_API_KEY
+                )
+    return _client
+
+
 model_name="gemini-2.5-flash"
+embedding_model_name = os.getenv("GEMINI_EMBEDDING_MODEL", "text-embedding-004")
+
+# --- Static prefix caching ---
+# Optional system instruction shared by every request.
+SYSTEM_INSTRUCTION = os.getenv("GEMINI_SYSTEM_INSTRUCTION")
+# When enabled, the tool schema + system instruction are uploaded once with the
+# API's cached-content feature and every request only references the cache.
+USE_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() in ("1", "true", "yes")
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+# Recreate the cached content a bit before it expires on the server.
+CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = 60
+
+# prefix hash -> GenerateContentConfig, built once per distinct tool list.
+_config_cache: dict[str, types.GenerateContentConfig] = {}
+# prefix hash -> (cached content name or None if creation failed, expiry timestamp)
+_cached_contents: dict[str, tuple[str, float]] = {}
+_config_lock = threading.Lock()
 
 # model = genai.GenerativeModel(
 #     safety_settings=default_safety_settings
 # )
 
+
+def _prefix_key(tools: list | None) -> str:
+    """Stable hash of the static request prefix (tool schema + system instruction)."""
+    prefix = json.dumps([tools or [], SYSTEM_INSTRUCTION], sort_keys=True)
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+
+
+def _create_cached_content(key: str, tools: list | None) -> str | None:
+    """Uploads the static prefix with `caches.create` and returns its name."""
+    try:
+        cache = get_client().caches.create(
+            model=model_name,
+            config=types.CreateCachedContentConfig(
+                display_name=f"mcp-prefix-{key[:12]}",
+                system_instruction=SYSTEM_INSTRUCTION,
+                tools=[types.Tool(function_declarations=tools)] if tools else None,
+                ttl=f"{CONTEXT_CACHE_TTL_SECONDS}s",
+            ),
+        )
+    except Exception as e:
+        # e.g. the prefix is below the model's minimum cacheable size.
+        # Remember the failure so we don't retry on every request.
+        print(f"  [REAL Gemini] Context cache unavailable, sending prefix inline: {e}")
+        _cached_contents[key] = (None, time.time() + CONTEXT_CACHE_TTL_SECONDS)
+        return None
+    expires_at = time.time() + CONTEXT_CACHE_TTL_SECONDS - CONTEXT_CACHE_REFRESH_MARGIN_SECONDS
+    _cached_contents[key] = (cache.name, expires_at)
+    print(f"  [REAL Gemini] Created context cache {cache.name}")
+    return cache.name
+
+
+def get_generate_config(tools: list | None) -> types.GenerateContentConfig | None:
+    """
+    Returns the `GenerateContentConfig` for a tool list, building it only once.
+
+    With `GEMINI_CONTEXT_CACHE` enabled the config references a server-side
+    cached content holding the tools and system instruction instead of
+    carrying them inline.
+    """
+    if not tools and not SYSTEM_INSTRUCTION:
+        return None
+
+    key = _prefix_key(tools)
+    with _config_lock:
+        if USE_CONTEXT_CACHE:
+            name, expires_at = _cached_contents.get(key, (None, 0.0))
+            if time.time() >= expires_at:
+                _config_cache.pop(key, None)
+                name = _create_cached_content(key, tools)
+            if name is not None:
+                config = _config_cache.get(key)
+                if config is None:
+                    config = types.GenerateContentConfig(cached_content=name)
+                    _config_cache[key] = config
+                return config
+
+        config = _config_cache.get(key)
+        if config is None or config.cached_content:
+            # Not built yet, or the cached content it referenced has expired.
+            config = types.GenerateContentConfig(
+                system_instruction=SYSTEM_INSTRUCTION,
+                tools=[types.Tool(function_declarations=tools)] if tools else None,
+            )
+            _config_cache[key] = config
+        return config
+
+
 def call_gemini_api(payload: dict) -> dict:
     """
     Calls the real Gemini API's generateContent method.
@@ -50,30 +156,31 @@ def call_gemini_api(payload: dict) -> dict:
 
     # Extract arguments from the payload
     contents = payload.get("contents")
-    tools = payload.get("tools")
-    tools = types.Tool(function_declarations=tools) if tools else None
-    config = types.GenerateContentConfig(tools=[tools])
+    config = get_generate_config(payload.get("tools"))
     try:
         # --- Make the actual API call ---
         # The SDK handles chat history (contents) and tool definitions
-        if tools:
-            response = client.models.generate_content(
+        if config:
+            response = get_client().models.generate_content(
                 model=model_name, contents=contents, config=config)
         else:
             # Don't send `tools=None` if there are no tools (e.g., synthesis call)
-            response = client.models.generate_content(model=model_name, contents=contents)
+            response = get_client().models.generate_content(model=model_name, contents=contents)
 
         # --- Convert Response to Dictionary ---
         # Your `main.py` expects a dictionary, not a SDK object.
-        # `MessageToDict` converts the Google Protobuf object into a
-        # dictionary that matches the JSON structure `main.py` was built for.
-        # response_dict = MessageToDict(response._result)
+        response_dict = response.model_dump()
 
-        # response.
-        print("  [REAL Gemini] API call successful. Response:")
-        print("  " + json.dumps(response.model_dump_json(), indent=2).replace("\n", "\n  "))
+        usage = response_dict.get("usage_metadata") or {}
+        tracing.record_tokens(usage)
+        print(f"  [REAL Gemini] API call successful "
+              f"(prompt tokens: {usage.get('prompt_token_count')}, "
+              f"output tokens: {usage.get('candidates_token_count')}).")
+        # The full response is only serialised when debug logging is enabled.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(response.model_dump_json())
 
-        return response.model_dump()
+        return response_dict
 
     except Exception as e:
         print(f"  [REAL Gemini] API Error: {e}")
@@ -81,3 +188,8 @@ def call_gemini_api(payload: dict) -> dict:
         # For now, we'll re-raise to the FastAPI handler
         raise e
 
+
+def embed_text(text: str) -> list[float]:
+    """Returns the embedding vector of `text` (used by the response cache)."""
+    result = get_client().models.embed_content(model=embedding_model_name, contents=text)
+    return list(result.embeddings[0].values)
@@ -0,0 +1,148 @@
+"""
+Local mirror of the primary Google Calendar, kept fresh with incremental sync.
+
+The first sync lists every event from `MIRROR_PAST_DAYS` ago onwards and keeps
+the `nextSyncToken`. Later syncs send only that token, so the API returns just
+the events created, changed or cancelled since (usually an empty page).
+Range queries are then answered from memory.
+
+See https://developers.google.com/calendar/api/guides/sync
+"""
+import datetime
+import threading
+import time
+
+import pytz
+from googleapiclient.errors import HttpError
+
+# How far back the mirror reaches. Older ranges are queried from the API.
+MIRROR_PAST_DAYS = 365
+# Minimum seconds between two incremental syncs; reads within this window are
+# served from memory without any HTTP request.
+MIN_SYNC_INTERVAL = 30
+
+
+def simplify_event(event: dict) -> dict:
+    """Reduces an API event to the fields we send back to the AI."""
+    start = event['start'].get('dateTime', event['start'].get('date'))
+    end = event['end'].get('dateTime', event['end'].get('date'))
+    return {
+        'summary': event.get('summary', '(No title)'),
+        'start': start,
+        'end': end,
+        'id': event['id'],
+    }
+
+
+def parse_event_time(value: str, tz) -> datetime.datetime:
+    """Parses an event `dateTime` or all-day `date` into an aware datetime."""
+    if 'T' in value:
+        return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    day = datetime.datetime.strptime(value, '%Y-%m-%d')
+    return tz.localize(day)
+
+
+class CalendarMirror:
+    """
+    In-memory copy of one calendar's events.
+
+    Args:
+        get_service: Callable returning an authenticated Calendar service.
+        calendar_id: The calendar to mirror.
+        tz: Timezone used for all-day events and day boundaries.
+    """
+
+    def __init__(self, get_service, calendar_id: str = 'primary', tz=pytz.UTC):
+        self.get_service = get_service
+        self.calendar_id = calendar_id
+        self.tz = tz
+        # event id -> (start, end, simplified event)
+        self._events: dict[str, tuple[datetime.datetime, datetime.datetime, dict]] = {}
+        self._sync_token = None
+        self._window_start = None
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+
+    def _apply(self, event: dict):
+        if event.get('status') == 'cancelled':
+            self._events.pop(event['id'], None)
+            return
+        if 'start' not in event or 'end' not in event:
+            return
+        simple = simplify_event(event)
+        self._events[event['id']] = (
+            parse_event_time(simple['start'], self.tz),
+            parse_event_time(simple['end'], self.tz),
+            simple,
+        )
+
+    def _list_pages(self, service, **params):
+        page_token = None
+        while True:
+            result = service.events().list(
+                calendarId=self.calendar_id, pageToken=page_token, **params
+            ).execute()
+            for event in result.get('items', []):
+                self._apply(event)
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return result.get('nextSyncToken')
+
+    def _full_sync(self, service):
+        print("  [GCal Mirror] Full sync...")
+        self._events.clear()
+        self._window_start = None
+        window_start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=MIRROR_PAST_DAYS)
+        self._sync_token = self._list_pages(
+            service,
+            timeMin=window_start.isoformat(),
+            singleEvents=True,
+            showDeleted=True,
+            maxResults=2500,
+        )
+        self._window_start = window_start
+        print(f"  [GCal Mirror] Mirrored {len(self._events)} events.")
+
+    def sync(self, force: bool = False):
+        """Brings the mirror up to date (incrementally when possible)."""
+        with self._lock:
+            if not force and time.time() - self._last_sync < MIN_SYNC_INTERVAL:
+                return
+            service = self.get_service()
+            if not service:
+                raise RuntimeError("Failed to authenticate with Google Calendar.")
+            if self._sync_token is None:
+                self._full_sync(service)
+            else:
+                try:
+                    self._sync_token = self._list_pages(
+                        service, syncToken=self._sync_token, singleEvents=True,
+                        showDeleted=True, maxResults=2500,
+                    )
+                except HttpError as error:
+                    if error.resp.status != 410:
+                        raise
+                    # The sync token expired: start over.
+                    print("  [GCal Mirror] Sync token expired, resyncing.")
+                    self._sync_token = None
+                    self._full_sync(service)
+            self._last_sync = time.time()
+
+    def upsert(self, event: dict):
+        """Applies an event we just wrote, so the next read sees it without a sync."""
+        with self._lock:
+            self._apply(event)
+
+    def covers(self, start: datetime.datetime) -> bool:
+        return self._window_start is not None and start >= self._window_start
+
+    def query(self, start: datetime.datetime, end: datetime.datetime) -> list[dict]:
+        """Returns the events overlapping `[start, end)`, ordered by start time."""
+        with self._lock:
+            matches = [
+                (ev_start, simple)
+                for ev_start, ev_end, simple in self._events.values()
+                if ev_start < end and ev_end > start
+            ]
+        matches.sort(key=lambda item: item[0])
+        return [simple for _, simple in matches]
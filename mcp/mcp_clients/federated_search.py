@@ -0,0 +1,278 @@
+"""
+MCP Client for federated paper search.
+
+Queries Semantic Scholar, Google CSE, the local result cache and the full
+text of the downloaded PDFs at once and returns whatever has arrived when
+the latency budget runs out. Each source ranks its own results; the
+rankings are fused with reciprocal rank fusion (RRF) and papers found by
+several sources are merged on DOI, corpusId or canonical URL.
+"""
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from surveyor.utils.papers import normalise_doi, paper_keys as _paper_keys
+
+DEFAULT_BUDGET = float(os.getenv("FEDERATED_SEARCH_BUDGET", "10"))
+# Stays below the registry timeout of the tool.
+MAX_BUDGET = 45.0
+# RRF constant: higher values flatten the advantage of the top ranks.
+RRF_K = 60
+# Abstracts are trimmed so a fused ranking fits in the model context.
+ABSTRACT_CHARS = 500
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def _paper(title, doi=None, corpus_id=None, url=None, year=None, abstract=None, citations=None) -> dict:
+    return {
+        "title": (title or "").strip(),
+        "doi": normalise_doi(doi),
+        "corpusId": corpus_id,
+        "url": url,
+        "year": year,
+        "citationCount": citations,
+        "abstract": (abstract or "")[:ABSTRACT_CHARS] or None,
+    }
+
+
+def _from_semantic_scholar_record(record: dict) -> dict:
+    external_ids = record.get("externalIds") or {}
+    abstract = record.get("abstract") or ((record.get("tldr") or {}).get("text"))
+    return _paper(
+        record.get("title"),
+        doi=external_ids.get("DOI"),
+        corpus_id=record.get("corpusId"),
+        url=record.get("url") or (f"https://doi.org/{external_ids['DOI']}" if external_ids.get("DOI") else None),
+        year=record.get("year"),
+        abstract=abstract,
+        citations=record.get("citationCount"),
+    )
+
+
+# --- Sources: each returns its papers, best first ---
+
+def search_semantic_scholar(query: str, limit: int) -> list[dict]:
+    from .semantic_scholar import search_papers
+
+    data = search_papers(query, limit=limit)
+    if "code" in data or "error" in data:
+        raise RuntimeError(f"Semantic Scholar error: {data}")
+    return [_from_semantic_scholar_record(record) for record in data.get("data") or []]
+
+
+def search_google_cse(query: str, limit: int) -> list[dict]:
+    from .google_scholar import web_search_multi_page
+
+    pages = max(1, min(3, (limit + 9) // 10))
+    data = web_search_multi_page(query, pages=pages, sort="relevance")
+    return [
+        _paper(r["title"], doi=normalise_doi(r["link"]), url=r["canonical_url"], abstract=r.get("snippet"))
+        for r in data["results"][:limit]
+    ]
+
+
+_local_index = {"signature": None, "papers": []}
+_local_index_lock = threading.Lock()
+
+
+def _local_cache_files() -> list[str]:
+    from surveyor.semantic_scholar.api import CACHE_DIR as SEMANTIC_SEARCH_DIR
+    from .google_scholar import RESULTS_DIR as GCSE_RESULTS_DIR
+
+    files = []
+    for directory in (SEMANTIC_SEARCH_DIR, GCSE_RESULTS_DIR):
+        if os.path.isdir(directory):
+            files.extend(
+                os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")
+            )
+    return sorted(files)
+
+
+def _load_local_papers(files: list[str]) -> list[dict]:
+    papers = []
+    for path in files:
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            continue
+        if isinstance(data.get("data"), list):
+            papers.extend(_from_semantic_scholar_record(record) for record in data["data"])
+        for r in data.get("results") or []:
+            papers.append(_paper(r.get("title"), doi=normalise_doi(r.get("link")),
+                                 url=r.get("canonical_url") or r.get("link"), abstract=r.get("snippet")))
+    return papers
+
+
+def search_local_cache(query: str, limit: int) -> list[dict]:
+    """Ranks previously fetched search results by query-term overlap."""
+    files = _local_cache_files()
+    signature = [(path, os.path.getmtime(path)) for path in files]
+    with _local_index_lock:
+        if _local_index["signature"] != signature:
+            _local_index["papers"] = _load_local_papers(files)
+            _local_index["signature"] = signature
+        papers = _local_index["papers"]
+
+    terms = set(TOKEN_RE.findall(query.lower()))
+    if not terms:
+        return []
+    scored = []
+    for paper in papers:
+        title_terms = set(TOKEN_RE.findall(paper["title"].lower()))
+        abstract_terms = set(TOKEN_RE.findall((paper["abstract"] or "").lower()))
+        score = 2 * len(terms & title_terms) + len(terms & abstract_terms)
+        if score:
+            scored.append((score, paper))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [paper for _, paper in scored[:limit]]
+
+
+_fulltext_index = {"signature": None, "chunks": []}
+_fulltext_index_lock = threading.Lock()
+
+
+def _load_fulltext_chunks(store) -> list[tuple[frozenset, dict]]:
+    from surveyor.pdf_chunks import papers_by_pdf_name
+
+    papers = papers_by_pdf_name()
+    chunks = []
+    for chunk in store.iter_chunks():
+        paper = papers.get(chunk["pdf"][:-len(".pdf")]) or {}
+        record = _paper(paper.get("title") or chunk["pdf"], doi=paper.get("doi"), url=paper.get("url"),
+                        year=paper.get("year"), abstract=chunk["text"], citations=paper.get("citation_count"))
+        record["page"] = chunk["page"]
+        chunks.append((frozenset(TOKEN_RE.findall(chunk["text"].lower())), record))
+    return chunks
+
+
+def search_local_fulltext(query: str, limit: int) -> list[dict]:
+    """Ranks the downloaded papers by their best matching page (see `surveyor.pdf_chunks`)."""
+    from surveyor.pdf_chunks import ChunkStore
+
+    store = ChunkStore()
+    signature = store.signature()
+    with _fulltext_index_lock:
+        if _fulltext_index["signature"] != signature:
+            _fulltext_index["chunks"] = _load_fulltext_chunks(store)
+            _fulltext_index["signature"] = signature
+        chunks = _fulltext_index["chunks"]
+
+    terms = set(TOKEN_RE.findall(query.lower()))
+    if not terms:
+        return []
+    best: dict[str, tuple[int, dict]] = {}
+    for chunk_terms, record in chunks:
+        score = len(terms & chunk_terms)
+        key = record["doi"] or record["title"]
+        if score and score > best.get(key, (0, None))[0]:
+            best[key] = (score, record)
+    scored = sorted(best.values(), key=lambda item: item[0], reverse=True)
+    return [record for _, record in scored[:limit]]
+
+
+SOURCES = {
+    "semantic_scholar": search_semantic_scholar,
+    "google_cse": search_google_cse,
+    "local_cache": search_local_cache,
+    "local_fulltext": search_local_fulltext,
+}
+
+
+# --- Fusion ---
+
+def paper_keys(paper: dict) -> list[str]:
+    return _paper_keys(paper, with_title=True)
+
+
+def fuse_rankings(rankings: dict[str, list[dict]], k: int = RRF_K) -> list[dict]:
+    """
+    Reciprocal rank fusion: a paper scores sum(1 / (k + rank)) over the
+    sources that returned it. Records sharing a DOI, corpusId or URL are
+    merged, the first non-empty value of each field winning; a record that
+    links two entries (e.g. the DOI of one and the URL of the other) merges
+    them into one.
+    """
+    by_key: dict[str, dict] = {}
+    merged: list[dict] = []
+    for source, papers in rankings.items():
+        for rank, paper in enumerate(papers, start=1):
+            matches = []
+            for key in paper_keys(paper):
+                if key in by_key and not any(by_key[key] is match for match in matches):
+                    matches.append(by_key[key])
+            if not matches:
+                entry = {**paper, "score": 0.0, "sources": {}}
+                merged.append(entry)
+            else:
+                entry = matches[0]
+                for other in [*matches[1:], paper]:
+                    for field, value in other.items():
+                        if field not in ("score", "sources") and entry.get(field) in (None, "") and value not in (None, ""):
+                            entry[field] = value
+                for other in matches[1:]:
+                    for name, other_rank in other["sources"].items():
+                        entry["sources"][name] = min(other_rank, entry["sources"].get(name, other_rank))
+                    for key in paper_keys(other):
+                        by_key[key] = entry
+                    merged = [e for e in merged if e is not other]
+            if source not in entry["sources"]:
+                entry["sources"][source] = rank
+            for key in paper_keys(entry):
+                by_key[key] = entry
+    for entry in merged:
+        entry["score"] = round(sum(1.0 / (k + rank) for rank in entry["sources"].values()), 5)
+    merged.sort(key=lambda entry: entry["score"], reverse=True)
+    return merged
+
+
+def federated_search(query: str, limit=20, budget_seconds=DEFAULT_BUDGET, sources=None) -> dict:
+    """
+    Runs the sources concurrently and fuses what arrived within
+    `budget_seconds`. Late sources are reported as timed out and their
+    results dropped; failed ones are reported with their error. A result
+    missing any source is marked `partial` (cached briefly, see `tool_cache`).
+    """
+    limit = int(limit)
+    budget = min(float(budget_seconds), MAX_BUDGET)
+    names = [name for name in (sources or SOURCES) if name in SOURCES]
+    print(f"  [MCP Tool] federated_search '{query}' over {names}, budget {budget}s")
+
+    started = time.perf_counter()
+    # One executor per call, one thread per source: a source still running
+    # after the budget keeps only its own thread and never delays later calls.
+    executor = ThreadPoolExecutor(max_workers=max(1, len(names)), thread_name_prefix="federated")
+    futures = {executor.submit(SOURCES[name], query, limit): name for name in names}
+    done, _ = wait(futures, timeout=budget)
+    executor.shutdown(wait=False)
+
+    rankings, status = {}, {}
+    for future, name in futures.items():
+        if future not in done:
+            future.cancel()
+            status[name] = {"status": "timed_out"}
+            continue
+        try:
+            rankings[name] = future.result()
+            status[name] = {"status": "ok", "results": len(rankings[name])}
+        except Exception as e:
+            print(f"  [MCP Tool] federated_search source {name} failed: {e}")
+            status[name] = {"status": "error", "error": str(e)}
+
+    papers = fuse_rankings(rankings)[:limit]
+    result = {
+        "query": query,
+        "elapsed_seconds": round(time.perf_counter() - started, 2),
+        "sources": status,
+        "results": papers,
+    }
+    if any(entry["status"] != "ok" for entry in status.values()):
+        result["partial"] = True
+    if not rankings:
+        # Reported as an error so the empty answer is not cached.
+        result["error"] = f"No source answered within {budget} seconds."
+    return result
@@ -0,0 +1,52 @@
+"""
+Gemini tool schemas of the federated paper search MCP client.
+
+Kept apart from `federated_search` so the registry can advertise the tool
+without importing the search clients it fans out to.
+"""
+
+federated_search_tool_definitions = [
+    {
+        "name": "federated_search",
+        "description": "Searches academic papers in Semantic Scholar, Google Custom Search, the local result cache and the full text of the downloaded PDFs at once, and returns one fused, deduplicated ranking. Prefer it over calling the individual search tools one after another.",
+        "parameters": {
+            "type": "OBJECT",
+            "properties": {
+                "query": {
+                    "type": "STRING",
+                    "description": "The search query (e.g., 'cross-organizational identity management')."
+                },
+                "limit": {
+                    "type": "INTEGER",
+                    "description": "The maximum number of papers to return. Defaults to 20."
+                },
+                "budget_seconds": {
+                    "type": "NUMBER",
+                    "description": "How long to wait for the sources; slower ones are left out. Defaults to 10."
+                },
+                "sources": {
+                    "type": "ARRAY",
+                    "items": {"type": "STRING", "enum": ["semantic_scholar", "google_cse", "local_cache", "local_fulltext"]},
+                    "description": "Sources to query. Defaults to all of them."
+                }
+            },
+            "required": ["query"]
+        }
+    }
+]
+
+
+# Registry manifest: how each tool is loaded and run (see `registry.register_tool`).
+# The tool enforces its own latency budget; the timeout is only a backstop.
+# Complete results are kept for an hour; results missing a source (timed
+# out or failed) for a minute only, so the next call can fill the gap.
+federated_search_tool_manifest = [
+    {
+        "name": "federated_search",
+        "implementation": "mcp_clients.federated_search:federated_search",
+        "max_concurrency": 2,
+        "timeout": 60,
+        "ttl": 60 * 60,
+        "partial_ttl": 60,
+    },
+]
@@ -32,6 +32,7 @@ It will then save a `token.json` file for future use.
 """
 import datetime
 import os.path
+import threading
 import pytz
 
 from google.auth.transport.requests import Request
@@ -40,6 +41,9 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from .calendar_mirror import CalendarMirror, simplify_event, parse_event_time
+from .google_calendar_schema import google_calendar_tool_definitions
+
 # Define the scopes. If you modify these, delete token.json.
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
@@ -50,46 +54,116 @@ CREDS_PATH = os.path.join(BASE_DIR, 'credentials.json')
 TOKEN_PATH = os.path.join(BASE_DIR, 'token.json')
 
 
-def get_calendar_service():
+# Refresh the access token this long before it actually expires, so a tool
+# call never has to wait for a refresh in the middle of a request.
+TOKEN_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+
+class CalendarServiceHolder:
     """
-    Handles the OAuth 2.0 flow and returns a Google Calendar service object.
-    
-    - Checks for an existing, valid `token.json`.
-    - If not found or expired, it uses `credentials.json` to run the
-      console-based auth flow.
-    - Saves the new token for next time.
+    Long-lived, thread-safe holder of the Calendar credentials and service.
+
+    - `token.json` is read once, not on every tool call.
+    - The service is built once from the static discovery document shipped
+      with `googleapiclient` (no discovery HTTP request).
+    - The access token is refreshed proactively, shortly before expiry.
+
+    `googleapiclient` service objects are not thread-safe (they share an
+    `httplib2.Http`), so one service is kept per thread; building it from the
+    static document is cheap.
     """
-    creds = None
-    # The file token.json stores the user's access and refresh tokens, and is
-    # created automatically when the authorization flow completes for the first
-    # time.
-    if os.path.exists(TOKEN_PATH):
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
-    
-    # If there are no (valid) credentials available, let the user log in.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                print("  [GCal] Refreshing expired token...")
-                creds.refresh(Request())
-            except Exception as e:
-                print(f"  [GCal] Error refreshing token: {e}")
-                print("  [GCal] Token refresh failed. Please re-authorize.")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._creds = None
+        self._local = threading.local()
+
+    def _load_credentials(self):
+        creds = None
+        # The file token.json stores the user's access and refresh tokens, and is
+        # created automatically when the authorization flow completes for the first
+        # time.
+        if os.path.exists(TOKEN_PATH):
+            creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
+
+        # If there are no (valid) credentials available, let the user log in.
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds = self._refresh(creds)
+            else:
+                print("  [GCal] No valid token found. Starting auth flow...")
                 creds = run_auth_flow()
-        else:
-            print("  [GCal] No valid token found. Starting auth flow...")
-            creds = run_auth_flow()
-        
+            self._save(creds)
+        return creds
+
+    @staticmethod
+    def _save(creds):
         # Save the credentials for the next run
         print(f"  [GCal] Saving new token to {TOKEN_PATH}")
         with open(TOKEN_PATH, 'w') as token:
             token.write(creds.to_json())
 
-    # Build and return the service object
-    try:
-        service = build('calendar', 'v3', credentials=creds)
-        print("  [GCal] Google Calendar service created successfully.")
+    @staticmethod
+    def _refresh(creds):
+        try:
+            print("  [GCal] Refreshing token...")
+            creds.refresh(Request())
+            return creds
+        except Exception as e:
+            print(f"  [GCal] Error refreshing token: {e}")
+            print("  [GCal] Token refresh failed. Please re-authorize.")
+            return run_auth_flow()
+
+    def _needs_refresh(self) -> bool:
+        creds = self._creds
+        if not creds.valid:
+            return True
+        if creds.expiry is None:
+            return False
+        # `Credentials.expiry` is a naive UTC datetime.
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return creds.expiry - now <= TOKEN_REFRESH_MARGIN
+
+    def get_credentials(self):
+        with self._lock:
+            if self._creds is None:
+                self._creds = self._load_credentials()
+            elif self._creds.refresh_token and self._needs_refresh():
+                self._creds = self._refresh(self._creds)
+                self._save(self._creds)
+            return self._creds
+
+    def get_service(self):
+        creds = self.get_credentials()
+        service = getattr(self._local, "service", None)
+        if service is None or getattr(self._local, "creds", None) is not creds:
+            service = build('calendar', 'v3', credentials=creds, static_discovery=True,
+                            cache_discovery=False)
+            self._local.service = service
+            self._local.creds = creds
+            print("  [GCal] Google Calendar service created successfully.")
         return service
+
+    def reset(self):
+        """Forgets the cached credentials and services (e.g. after re-auth)."""
+        with self._lock:
+            self._creds = None
+            self._local = threading.local()
+
+
+_service_holder = CalendarServiceHolder()
+
+
+def get_calendar_service():
+    """
+    Returns the shared Google Calendar service object.
+
+    - Credentials are loaded from `token.json` once and refreshed before expiry.
+    - If no valid token exists, it uses `credentials.json` to run the
+      console-based auth flow and saves the new token for next time.
+    """
+    try:
+        return _service_holder.get_service()
     except HttpError as error:
         print(f'  [GCal] An error occurred building the service: {error}')
         return None
@@ -107,59 +181,65 @@ def run_auth_flow():
     creds = flow.run_local_server(port=0)
     return creds
 
+# Timezone of the day boundaries used by the fetch tools.
+QUERY_TZ = pytz.timezone('UTC') # Or get from user settings
+# Longest range the range tool accepts, to keep tool results bounded.
+MAX_RANGE_DAYS = 62
+
+_mirror = CalendarMirror(get_calendar_service, calendar_id='primary', tz=QUERY_TZ)
+
+
+def _query_events(time_min: datetime.datetime, time_max: datetime.datetime) -> list[dict]:
+    """
+    Returns simplified events overlapping `[time_min, time_max)`.
+
+    Served from the local mirror (after a cheap incremental sync) when the
+    range is inside the mirrored window, otherwise queried from the API.
+    """
+    try:
+        _mirror.sync()
+        if _mirror.covers(time_min):
+            return _mirror.query(time_min, time_max)
+    except HttpError as error:
+        print(f"  [GCal Mirror] Sync failed, querying the API directly: {error}")
+
+    print(f"  [REAL GCal] Querying from {time_min.isoformat()} to {time_max.isoformat()}")
+    service = get_calendar_service()
+    events = []
+    page_token = None
+    while True:
+        events_result = service.events().list(
+            calendarId='primary',
+            timeMin=time_min.isoformat(),
+            timeMax=time_max.isoformat(),
+            singleEvents=True,
+            orderBy='startTime',
+            pageToken=page_token
+        ).execute()
+        events.extend(events_result.get('items', []))
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            break
+    return [simplify_event(event) for event in events]
+
+
 def fetch_calendar_events(date: str) -> list[dict]:
     """
     REAL: Fetches Google Calendar events for a specific date.
     """
     print(f"  [REAL GCal] Fetching events for {date}")
-    service = get_calendar_service()
-    if not service:
-        return {"error": "Failed to authenticate with Google Calendar."}
-
     try:
         # Parse the date and set up timezone-aware start/end times
         # This is crucial for Google API
         target_date = datetime.datetime.strptime(date, '%Y-%m-%d').date()
-        
-        # We'll use the system's local timezone.
-        # For a production server, you might want to specify one (e.g., 'UTC')
-        local_tz = pytz.timezone('UTC') # Or get from user settings
-        
-        time_min = datetime.datetime.combine(target_date, datetime.time.min, tzinfo=local_tz)
-        time_max = datetime.datetime.combine(target_date, datetime.time.max, tzinfo=local_tz)
-
-        # Convert to ISO format
-        time_min_iso = time_min.isoformat()
-        time_max_iso = time_max.isoformat()
-
-        print(f"  [REAL GCal] Querying from {time_min_iso} to {time_max_iso}")
+        time_min = QUERY_TZ.localize(datetime.datetime.combine(target_date, datetime.time.min))
+        time_max = time_min + datetime.timedelta(days=1)
 
-        events_result = service.events().list(
-            calendarId='primary',
-            timeMin=time_min_iso,
-            timeMax=time_max_iso,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        events = events_result.get('items', [])
-
-        if not events:
+        simplified_events = _query_events(time_min, time_max)
+        if not simplified_events:
             print("  [REAL GCal] No events found.")
             return []
 
-        # Simplify the event list to send back to the AI
-        simplified_events = []
-        for event in events:
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            end = event['end'].get('dateTime', event['end'].get('date'))
-            simplified_events.append({
-                'summary': event['summary'],
-                'start': start,
-                'end': end,
-                'id': event['id']
-            })
-        
         print(f"  [REAL GCal] Found {len(simplified_events)} events.")
         return simplified_events
 
@@ -171,6 +251,92 @@ def fetch_calendar_events(date: str) -> list[dict]:
         return {'error': str(e)}
 
 
+def fetch_calendar_events_range(start_date: str, end_date: str) -> dict:
+    """
+    REAL: Fetches Google Calendar events from `start_date` to `end_date`
+    (both inclusive), grouped by day.
+    """
+    print(f"  [REAL GCal] Fetching events from {start_date} to {end_date}")
+    try:
+        first_day = datetime.datetime.strptime(start_date, '%Y-%m-%d').date()
+        last_day = datetime.datetime.strptime(end_date, '%Y-%m-%d').date()
+        if last_day < first_day:
+            return {'error': 'end_date must not be before start_date.'}
+        if (last_day - first_day).days >= MAX_RANGE_DAYS:
+            return {'error': f'Date range is limited to {MAX_RANGE_DAYS} days.'}
+
+        time_min = QUERY_TZ.localize(datetime.datetime.combine(first_day, datetime.time.min))
+        time_max = QUERY_TZ.localize(datetime.datetime.combine(last_day, datetime.time.min)) \
+            + datetime.timedelta(days=1)
+        events = _query_events(time_min, time_max)
+
+        days = {}
+        day = first_day
+        while day <= last_day:
+            days[day.isoformat()] = []
+            day += datetime.timedelta(days=1)
+        for event in events:
+            event_start = parse_event_time(event['start'], QUERY_TZ).astimezone(QUERY_TZ).date()
+            # Multi-day events started before the range are listed on its first day.
+            key = max(event_start, first_day).isoformat()
+            if key in days:
+                days[key].append(event)
+
+        print(f"  [REAL GCal] Found {len(events)} events.")
+        return {'start_date': start_date, 'end_date': end_date, 'events_by_day': days}
+
+    except HttpError as error:
+        print(f'  [REAL GCal] An error occurred: {error}')
+        return {'error': str(error)}
+    except Exception as e:
+        print(f'  [REAL GCal] A general error occurred: {e}')
+        return {'error': str(e)}
+
+
+# Timezone of events created by the add tools.
+EVENT_TZ = pytz.timezone('Asia/Kolkata') # IST timezone
+# The Calendar API accepts at most 50 calls per batch request.
+MAX_BATCH_SIZE = 50
+
+
+def _build_event_body(summary: str, date: str, start_time: str, end_time: str) -> dict:
+    """Builds the insert body of a timed event in `EVENT_TZ`."""
+    # We need to combine date and time and make it timezone-aware
+    start_dt = datetime.datetime.strptime(f"{date} {start_time}", '%Y-%m-%d %H:%M')
+    end_dt = datetime.datetime.strptime(f"{date} {end_time}", '%Y-%m-%d %H:%M')
+
+    start_dt_tz = EVENT_TZ.localize(start_dt)
+    end_dt_tz = EVENT_TZ.localize(end_dt)
+
+    return {
+        'summary': summary,
+        'start': {
+            'dateTime': start_dt_tz.isoformat(),
+            'timeZone': str(EVENT_TZ),
+        },
+        'end': {
+            'dateTime': end_dt_tz.isoformat(),
+            'timeZone': str(EVENT_TZ),
+        },
+        # You could also add attendees, location, etc.
+        # 'attendees': [
+        #     {'email': 'example@example.com'},
+        # ],
+    }
+
+
+def _simplify_created_event(created_event: dict) -> dict:
+    """Returns a simplified version of an inserted event for the AI."""
+    return {
+        'status': created_event.get('status'),
+        'summary': created_event.get('summary'),
+        'start': created_event['start'].get('dateTime'),
+        'end': created_event['end'].get('dateTime'),
+        'id': created_event.get('id'),
+        'htmlLink': created_event.get('htmlLink')
+    }
+
+
 def add_calendar_event(summary: str, date: str, start_time: str, end_time: str) -> dict:
     """
     REAL: Adds a new event to the Google Calendar.
@@ -182,30 +348,7 @@ def add_calendar_event(summary: str, date: str, start_time: str, end_time: str)
 
     try:
         # Construct the event body
-        # We need to combine date and time and make it timezone-aware
-        local_tz = pytz.timezone('Asia/Kolkata') # IST timezone
-        
-        start_dt = datetime.datetime.strptime(f"{date} {start_time}", '%Y-%m-%d %H:%M')
-        end_dt = datetime.datetime.strptime(f"{date} {end_time}", '%Y-%m-%d %H:%M')
-
-        start_dt_tz = local_tz.localize(start_dt)
-        end_dt_tz = local_tz.localize(end_dt)
-
-        event_body = {
-            'summary': summary,
-            'start': {
-                'dateTime': start_dt_tz.isoformat(),
-                'timeZone': str(local_tz),
-            },
-            'end': {
-                'dateTime': end_dt_tz.isoformat(),
-                'timeZone': str(local_tz),
-            },
-            # You could also add attendees, location, etc.
-            # 'attendees': [
-            #     {'email': 'example@example.com'},
-            # ],
-        }
+        event_body = _build_event_body(summary, date, start_time, end_time)
 
         print(f"  [REAL GCal] Inserting event: {event_body}")
         
@@ -215,16 +358,10 @@ def add_calendar_event(summary: str, date: str, start_time: str, end_time: str)
         ).execute()
 
         print(f"  [REAL GCal] Event created successfully. Event ID: {created_event.get('id')}")
+        _mirror.upsert(created_event)
         
         # Return a simplified version for the AI
-        return {
-            'status': created_event.get('status'),
-            'summary': created_event.get('summary'),
-            'start': created_event['start'].get('dateTime'),
-            'end': created_event['end'].get('dateTime'),
-            'id': created_event.get('id'),
-            'htmlLink': created_event.get('htmlLink')
-        }
+        return _simplify_created_event(created_event)
 
     except HttpError as error:
         print(f'  [REAL GCal] An error occurred: {error}')
@@ -233,43 +370,57 @@ def add_calendar_event(summary: str, date: str, start_time: str, end_time: str)
         print(f'  [REAL GCal] A general error occurred: {e}')
         return {'error': str(e)}
 
-google_calendar_tool_definitions = [{
-        "name": "fetch_calendar_events",
-        "description": "Get a list of Google Calendar events for a specific date.",
-        "parameters": {
-            "type": "OBJECT",
-            "properties": {
-                "date": {
-                    "type": "STRING",
-                    "description": "The date to fetch events for, in YYYY-MM-DD format."
-                }
-            },
-            "required": ["date"]
-        }
-    },
-    {
-        "name": "add_calendar_event",
-        "description": "Add a new event to the Google Calendar.",
-        "parameters": {
-            "type": "OBJECT",
-            "properties": {
-                "summary": {
-                    "type": "STRING",
-                    "description": "The title or summary of the event (e.g., 'Dentist Appointment')."
-                },
-                "date": {
-                    "type": "STRING",
-                    "description": "The date of the event, in YYYY-MM-DD format."
-                },
-                "start_time": {
-                    "type": "STRING",
-                    "description": "The event start time in 24-hour HH:MM format (e.g., '14:30')."
-                },
-                "end_time": {
-                    "type": "STRING",
-                    "description": "The event end time in 24-hour HH:MM format (e.g., '15:30')."
-                }
-            },
-            "required": ["summary", "date", "start_time", "end_time"]
-        }
-    }]
\ No newline at end of file
+
+def add_calendar_events(events: list[dict]) -> dict:
+    """
+    REAL: Adds many events to the Google Calendar using the batch endpoint,
+    so up to 50 inserts share one HTTP round trip.
+
+    Each event is a dict with `summary`, `date`, `start_time` and `end_time`
+    (same formats as `add_calendar_event`). Returns one result per event, in
+    input order, each either the created event or an `error`.
+    """
+    print(f"  [REAL GCal] Adding {len(events)} events in batch")
+    service = get_calendar_service()
+    if not service:
+        return {"error": "Failed to authenticate with Google Calendar."}
+
+    results: list[dict] = [{} for _ in events]
+    bodies = {}
+    for i, event in enumerate(events):
+        try:
+            bodies[i] = _build_event_body(
+                event['summary'], event['date'], event['start_time'], event['end_time']
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            results[i] = {'error': f'Invalid event: {e}', 'input': event}
+
+    def on_response(request_id, response, exception):
+        i = int(request_id)
+        if exception is not None:
+            print(f'  [REAL GCal] Batch insert {i} failed: {exception}')
+            results[i] = {'error': str(exception), 'input': events[i]}
+        else:
+            _mirror.upsert(response)
+            results[i] = _simplify_created_event(response)
+
+    indices = list(bodies)
+    try:
+        for chunk_start in range(0, len(indices), MAX_BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=on_response)
+            for i in indices[chunk_start:chunk_start + MAX_BATCH_SIZE]:
+                batch.add(
+                    service.events().insert(calendarId='primary', body=bodies[i]),
+                    request_id=str(i)
+                )
+            batch.execute()
+    except HttpError as error:
+        print(f'  [REAL GCal] An error occurred: {error}')
+        return {'error': str(error), 'results': results}
+    except Exception as e:
+        print(f'  [REAL GCal] A general error occurred: {e}')
+        return {'error': str(e), 'results': results}
+
+    created = sum(1 for result in results if 'error' not in result)
+    print(f"  [REAL GCal] Batch done: {created}/{len(events)} events created.")
+    return {'created': created, 'failed': len(events) - created, 'results': results}
@@ -0,0 +1,135 @@
+"""
+Gemini tool schemas of the Google Calendar MCP client.
+
+Kept apart from `google_calendar` so the registry can advertise the tools
+without importing the Google API client stack.
+"""
+
+google_calendar_tool_definitions = [{
+        "name": "fetch_calendar_events",
+        "description": "Get a list of Google Calendar events for a specific date.",
+        "parameters": {
+            "type": "OBJECT",
+            "properties": {
+                "date": {
+                    "type": "STRING",
+                    "description": "The date to fetch events for, in YYYY-MM-DD format."
+                }
+            },
+            "required": ["date"]
+        }
+    },
+    {
+        "name": "fetch_calendar_events_range",
+        "description": "Get Google Calendar events for a range of dates (e.g. a whole week), grouped by day. Prefer this over several single-day calls.",
+        "parameters": {
+            "type": "OBJECT",
+            "properties": {
+                "start_date": {
+                    "type": "STRING",
+                    "description": "The first date of the range, in YYYY-MM-DD format."
+                },
+                "end_date": {
+                    "type": "STRING",
+                    "description": "The last date of the range (inclusive), in YYYY-MM-DD format."
+                }
+            },
+            "required": ["start_date", "end_date"]
+        }
+    },
+    {
+        "name": "add_calendar_event",
+        "description": "Add a new event to the Google Calendar.",
+        "parameters": {
+            "type": "OBJECT",
+            "properties": {
+                "summary": {
+                    "type": "STRING",
+                    "description": "The title or summary of the event (e.g., 'Dentist Appointment')."
+                },
+                "date": {
+                    "type": "STRING",
+                    "description": "The date of the event, in YYYY-MM-DD format."
+                },
+                "start_time": {
+                    "type": "STRING",
+                    "description": "The event start time in 24-hour HH:MM format (e.g., '14:30')."
+                },
+                "end_time": {
+                    "type": "STRING",
+                    "description": "The event end time in 24-hour HH:MM format (e.g., '15:30')."
+                }
+            },
+            "required": ["summary", "date", "start_time", "end_time"]
+        }
+    },
+    {
+        "name": "add_calendar_events",
+        "description": "Add many events to the Google Calendar in one call (e.g. a study plan or recurring sessions). Prefer this over several add_calendar_event calls.",
+        "parameters": {
+            "type": "OBJECT",
+            "properties": {
+                "events": {
+                    "type": "ARRAY",
+                    "description": "The events to add.",
+                    "items": {
+                        "type": "OBJECT",
+                        "properties": {
+                            "summary": {
+                                "type": "STRING",
+                                "description": "The title or summary of the event."
+                            },
+                            "date": {
+                                "type": "STRING",
+                                "description": "The date of the event, in YYYY-MM-DD format."
+                            },
+                            "start_time": {
+                                "type": "STRING",
+                                "description": "The event start time in 24-hour HH:MM format."
+                            },
+                            "end_time": {
+                                "type": "STRING",
+                                "description": "The event end time in 24-hour HH:MM format."
+                            }
+                        },
+                        "required": ["summary", "date", "start_time", "end_time"]
+                    }
+                }
+            },
+            "required": ["events"]
+        }
+    }]
+
+
+# Registry manifest: how each tool is loaded and run (see `registry.register_tool`).
+# The calendar API is a fast HTTP round trip, so tools time out quickly.
+google_calendar_tool_manifest = [
+    {
+        "name": "fetch_calendar_events",
+        "implementation": "mcp_clients.google_calendar:fetch_calendar_events",
+        "max_concurrency": 8,
+        "timeout": 30,
+        "ttl": 120,
+    },
+    {
+        "name": "fetch_calendar_events_range",
+        "implementation": "mcp_clients.google_calendar:fetch_calendar_events_range",
+        "max_concurrency": 8,
+        "timeout": 30,
+        "ttl": 120,
+    },
+    {
+        "name": "add_calendar_event",
+        "implementation": "mcp_clients.google_calendar:add_calendar_event",
+        "max_concurrency": 4,
+        "timeout": 30,
+        "invalidates": {"fetch_calendar_events": ["date"], "fetch_calendar_events_range": []},
+    },
+    {
+        "name": "add_calendar_events",
+        "implementation": "mcp_clients.google_calendar:add_calendar_events",
+        "max_concurrency": 2,
+        "timeout": 120,
+        "invalidates": {"fetch_calendar_events": [], "fetch_calendar_events_range": []},
+    },
+]
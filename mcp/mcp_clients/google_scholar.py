@@ -3,26 +3,32 @@ import urllib.parse
 import requests
 from bs4 import BeautifulSoup
 import os
+from concurrent.futures import ThreadPoolExecutor
 # from surveyor.providers.provider import Provider
 from surveyor.providers import *
 from surveyor.providers import provider
+from surveyor.parse_pool import EXTRACTED_FIELDS, parse_pool
+from surveyor.utils.browser_pool import browser_pool
+from surveyor.utils.urls import get_url_hash
+from .google_scholar_schema import gemini_google_gse_schema
 
 RESULTS_DIR = ".data/results/gcse"
 if not os.path.exists(RESULTS_DIR):
     os.makedirs(RESULTS_DIR)
 
+# Most result pages `web_search_multi_page` fetches (the CSE stops at 100 results).
+MAX_PAGES = 10
+
+# Query parameters that only track the click and never change the page.
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
 
 def get_url(query, page, px_cse="3487676ad0ae64afa", sort=""):
     query = urllib.parse.quote(query)
     return f"https://cse.google.com/cse?cx={px_cse}#gsc.tab=0&gsc.q={query}&gsc.sort={sort}&gsc.page={page}"
 
 
-def get_results(query, page=1, sort=""):
-    url = get_url(query, page, sort=sort)
-    prv = Provider(url, cache=False, fetch_mode="selenium")
-    print("Processing", url, prv.get_url_hash())
-
-    soup = prv.soup
+def parse_results(soup):
     res = soup.find_all("div", class_="gsc-webResult gsc-result")
     result = []
     for r in res:
@@ -31,7 +37,57 @@ def get_results(query, page=1, sort=""):
         snippet = r.find("div", class_="gs-bidi-start-align gs-snippet").text
         # print(title, link, snippet)
         result.append({"title": title, "link": link, "snippet": snippet})
-    return result, prv.get_url_hash()
+    return result
+
+
+def get_results(query, page=1, sort=""):
+    url = get_url(query, page, sort=sort)
+    print("Processing", url, get_url_hash(url))
+
+    # The results are rendered by JavaScript: load the page in a pooled browser.
+    soup = BeautifulSoup(browser_pool.fetch(url, provider_name="GoogleCSE"), "html.parser")
+    return parse_results(soup), get_url_hash(url)
+
+
+def canonical_url(link):
+    """
+    Normalises a result link so the same page found on several result pages
+    (http/https, www., tracking parameters, #fragment, trailing slash)
+    is merged into one result.
+    """
+    parsed = urllib.parse.urlsplit(link.strip())
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    path = parsed.path.rstrip("/") or "/"
+    return urllib.parse.urlunsplit(("https", host, path, urllib.parse.urlencode(query), ""))
+
+
+def merge_results(pages):
+    """
+    Merges the results of several pages (in page order), keeping the first
+    occurrence of each canonical URL and the pages it appeared on.
+    """
+    merged = {}
+    for page_num, results in pages:
+        for rank, r in enumerate(results, start=1):
+            key = canonical_url(r["link"])
+            if key in merged:
+                merged[key]["pages"].append(page_num)
+                continue
+            merged[key] = {**r, "canonical_url": key, "page": page_num, "rank": rank, "pages": [page_num]}
+    return list(merged.values())
+
+
+def page_details(record):
+    if "error" in record:
+        return {"error": record["error"]}
+    return {field: record[field] for field in EXTRACTED_FIELDS}
 
 
 def fetch_provider_details(result):
@@ -58,28 +114,48 @@ def web_search_query_by_page_id(query, page_num=1, sort="date"):
     # json_info = fetch_provider_details(result)
     with open(f"{RESULTS_DIR}/{urlhash}.json", "w", encoding="utf-8") as file:
         json.dump(json_info, file, indent=4)
-    
+
     return json_info
 
 
+def web_search_multi_page(query, pages=5, sort="date", enrich=False):
+    """
+    Fetches result pages 1..pages in parallel (bounded by the browser pool),
+    then merges and dedupes them by canonical URL. With `enrich`, every
+    publisher page is fetched concurrently and parsed in the `parse_pool`
+    processes for its title, DOI and abstract. `pages` is clamped to
+    1..MAX_PAGES.
+    """
+    pages = min(max(int(pages), 1), MAX_PAGES)
+    page_nums = list(range(1, pages + 1))
+
+    def fetch_page(page_num):
+        try:
+            return page_num, get_results(query, page_num, sort)[0], None
+        except Exception as e:
+            print(f"[GCSE] Page {page_num} failed: {e}")
+            return page_num, [], str(e)
+
+    with ThreadPoolExecutor(max_workers=min(len(page_nums), browser_pool.size)) as pool:
+        fetched = list(pool.map(fetch_page, page_nums))
+
+    results = merge_results((page_num, res) for page_num, res, _ in fetched)
+    if enrich and results:
+        records = parse_pool.extract_many([r["link"] for r in results], fetch_mode="requests")
+        results = [{**r, "details": page_details(record)} for r, record in zip(results, records)]
 
-gemini_google_gse_schema= [
-    {
-     "name": "web_search_query_by_page_id",
-     "description": "Performs a web search using Google Custom Search Engine (CSE) and returns results for the specified page number.",
-     "parameters": {
-        "type": "object",
-        "properties": {
-            "query": {"type": "string", "description": "Search query string"},
-            "page_num": {"type": "integer", "description": "Page number to fetch", "minimum": 1},
-            "sort": {"type": "string", "description": "Sort order for results", "enum": [ "relevance" ,"date"]},
-        },
-        "required": ["query"]
-        }
-    
+    json_info = {
+        "query": query,
+        "pages": page_nums,
+        "failed_pages": {page_num: error for page_num, _, error in fetched if error},
+        "results": results,
     }
-    
-    ]
+    urlhash = get_url_hash(f"{get_url(query, 'multi', sort=sort)}&pages={pages}&enrich={enrich}")
+    with open(f"{RESULTS_DIR}/{urlhash}.json", "w", encoding="utf-8") as file:
+        json.dump(json_info, file, indent=4)
+
+    return json_info
+
 
 
 if __name__ == "__main__":
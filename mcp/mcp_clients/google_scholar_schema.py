@@ -0,0 +1,59 @@
+"""
+Gemini tool schemas of the Google CSE search MCP client.
+
+Kept apart from `google_scholar` so the registry can advertise the tools
+without importing the surveyor providers (selenium, BeautifulSoup).
+"""
+
+gemini_google_gse_schema= [
+    {
+     "name": "web_search_query_by_page_id",
+     "description": "Performs a web search using Google Custom Search Engine (CSE) and returns results for the specified page number.",
+     "parameters": {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "Search query string"},
+            "page_num": {"type": "integer", "description": "Page number to fetch", "minimum": 1},
+            "sort": {"type": "string", "description": "Sort order for results", "enum": [ "relevance" ,"date"]},
+        },
+        "required": ["query"]
+        }
+    
+    },
+    {
+     "name": "web_search_multi_page",
+     "description": "Performs a web search using Google Custom Search Engine (CSE) over pages 1..pages at once and returns the merged, deduplicated results. Prefer it over several web_search_query_by_page_id calls when many results are needed.",
+     "parameters": {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "Search query string"},
+            "pages": {"type": "integer", "description": "Number of result pages to fetch (10 results each)", "minimum": 1, "maximum": 10},
+            "sort": {"type": "string", "description": "Sort order for results", "enum": [ "relevance" ,"date"]},
+            "enrich": {"type": "boolean", "description": "Also fetch title, DOI and abstract from each result's publisher page"},
+        },
+        "required": ["query"]
+        }
+    }
+    
+    ]
+
+
+# Registry manifest: how each tool is loaded and run (see `registry.register_tool`).
+# Searches render in the shared browser pool, so only a couple may run at once.
+google_scholar_tool_manifest = [
+    {
+        "name": "web_search_query_by_page_id",
+        "implementation": "mcp_clients.google_scholar:web_search_query_by_page_id",
+        "max_concurrency": 2,
+        "timeout": 120,
+        "ttl": 6 * 60 * 60,
+    },
+    {
+        # Fetches its pages through the shared browser pool, which bounds the browsers.
+        "name": "web_search_multi_page",
+        "implementation": "mcp_clients.google_scholar:web_search_multi_page",
+        "max_concurrency": 2,
+        "timeout": 300,
+        "ttl": 6 * 60 * 60,
+    },
+]
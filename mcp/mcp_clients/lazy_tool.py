@@ -0,0 +1,51 @@
+"""
+Lazy references to tool implementations.
+
+A `LazyTool` points at a function by its `"package.module:function"` path and
+only imports the module on the first call. The registry uses it so that
+importing it (and starting `app.py`) does not load the Google API client,
+selenium or BeautifulSoup until a tool that needs them is actually used.
+"""
+import importlib
+import inspect
+import threading
+from typing import Callable, Optional
+
+
+class LazyTool:
+    """Callable proxy that imports its target function on first use."""
+
+    def __init__(self, path: str):
+        module_name, _, func_name = path.partition(":")
+        if not module_name or not func_name:
+            raise ValueError(f"Tool path must look like 'package.module:function', got {path!r}")
+        self.path = path
+        self.module_name = module_name
+        self.func_name = func_name
+        self._func: Optional[Callable] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._func is not None
+
+    def resolve(self) -> Callable:
+        """Imports the module (once) and returns the target function."""
+        if self._func is None:
+            with self._lock:
+                if self._func is None:
+                    print(f"  [Registry] Loading tool module {self.module_name}")
+                    module = importlib.import_module(self.module_name)
+                    self._func = getattr(module, self.func_name)
+        return self._func
+
+    @property
+    def signature(self) -> inspect.Signature:
+        return inspect.signature(self.resolve())
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyTool {self.path} ({state})>"
@@ -0,0 +1,49 @@
+"""
+MCP Client for ranking the collected survey papers.
+
+Wraps `surveyor.ranking.RankingEngine`. The engine is built from the
+columnar export at SURVEY_EXPORT_PATH when it exists (reloaded when the
+file changes), otherwise from the caches, rebuilt at most every
+RANKING_RELOAD_SECONDS so newly fetched papers show up.
+"""
+import os
+import time
+import threading
+
+from surveyor.ranking import RankingEngine
+
+SURVEY_EXPORT_PATH = os.getenv("SURVEY_EXPORT_PATH", ".data/results/survey.arrow")
+RELOAD_SECONDS = float(os.getenv("RANKING_RELOAD_SECONDS", "300"))
+
+_engine = None
+_engine_version = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> RankingEngine:
+    global _engine, _engine_version
+    with _engine_lock:
+        if os.path.exists(SURVEY_EXPORT_PATH):
+            version = ("export", os.path.getmtime(SURVEY_EXPORT_PATH))
+            if _engine is None or _engine_version != version:
+                _engine = RankingEngine.from_survey(SURVEY_EXPORT_PATH)
+                _engine_version = version
+        elif (_engine is None or _engine_version[0] != "cache"
+                or time.time() - _engine_version[1] > RELOAD_SECONDS):
+            _engine = RankingEngine.from_cache()
+            _engine_version = ("cache", time.time())
+        return _engine
+
+
+def rank_papers(query=None, k=20, sort_by="score", min_year=None, max_year=None,
+                min_citations=None, providers=None) -> dict:
+    print(f"  [MCP Tool] rank_papers query={query!r} k={k} sort_by={sort_by}")
+    engine = get_engine()
+    try:
+        papers = engine.rank(
+            query, k=k, sort_by=sort_by, min_year=min_year, max_year=max_year,
+            min_citations=min_citations, providers=providers,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"papers_in_survey": engine.size, "count": len(papers), "results": papers}
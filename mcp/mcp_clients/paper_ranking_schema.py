@@ -0,0 +1,52 @@
+"""
+Gemini tool schemas of the paper ranking MCP client.
+
+Kept apart from `paper_ranking` so the registry can advertise the tool
+without importing NumPy and pyarrow.
+"""
+
+paper_ranking_tool_definitions = [
+    {
+        "name": "rank_papers",
+        "description": "Ranks and filters the papers already collected for the survey (no web search), e.g. 'the 20 most-cited papers since 2021' or 'the most relevant papers on zero trust'. Answers from local data in milliseconds.",
+        "parameters": {
+            "type": "OBJECT",
+            "properties": {
+                "query": {
+                    "type": "STRING",
+                    "description": "Optional topic; papers are then matched on title and abstract."
+                },
+                "k": {
+                    "type": "INTEGER",
+                    "description": "Number of papers to return. Defaults to 20."
+                },
+                "sort_by": {
+                    "type": "STRING",
+                    "enum": ["score", "citations", "year", "relevance"],
+                    "description": "'score' combines citations, recency and query relevance. Defaults to 'score'."
+                },
+                "min_year": {"type": "INTEGER", "description": "Only papers published in or after this year."},
+                "max_year": {"type": "INTEGER", "description": "Only papers published in or before this year."},
+                "min_citations": {"type": "INTEGER", "description": "Only papers with at least this many citations."},
+                "providers": {
+                    "type": "ARRAY",
+                    "items": {"type": "STRING"},
+                    "description": "Only papers from these publishers (e.g. 'ACMProvider', 'IEEEXplore')."
+                }
+            },
+            "required": []
+        }
+    }
+]
+
+
+# Registry manifest: how each tool is loaded and run (see `registry.register_tool`).
+# Not cached: it is cheaper to rank again than to return a stale ranking.
+paper_ranking_tool_manifest = [
+    {
+        "name": "rank_papers",
+        "implementation": "mcp_clients.paper_ranking:rank_papers",
+        "max_concurrency": 4,
+        "timeout": 30,
+    },
+]
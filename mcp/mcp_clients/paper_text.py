@@ -0,0 +1,27 @@
+"""
+MCP Client for searching the full text of the downloaded papers.
+
+See `surveyor.pdf_chunks` and `surveyor.embedding_index.ChunkEmbeddingIndex`.
+Each call first extracts and indexes the PDFs downloaded since the previous
+call (a no-op when nothing changed).
+"""
+from surveyor.embedding_index import ChunkEmbeddingIndex
+
+# Loaded from disk on first use.
+_index = None
+
+
+def get_index() -> ChunkEmbeddingIndex:
+    global _index
+    if _index is None:
+        _index = ChunkEmbeddingIndex()
+    return _index
+
+
+def search_paper_text(query, k=5) -> dict:
+    print(f"  [MCP Tool] search_paper_text query={query[:60]!r} k={k}")
+    index = get_index()
+    index.store.sync()
+    index.refresh()
+    results = index.similar(text=query, k=int(k))
+    return {"pdfs_indexed": len(index.store.manifest), "chunks_indexed": len(index.papers), "results": results}
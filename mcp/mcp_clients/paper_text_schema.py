@@ -0,0 +1,39 @@
+"""
+Gemini tool schemas of the paper full-text MCP client.
+
+Kept apart from `paper_text` so the registry can advertise the tool
+without importing NumPy and the chunk index.
+"""
+
+paper_text_tool_definitions = [
+    {
+        "name": "search_paper_text",
+        "description": "Searches the full text of the downloaded papers (PDFs) and returns the passages most related to a question, with their paper and page. Use it for questions about methods, results or details that abstracts do not cover. Local: no web access.",
+        "parameters": {
+            "type": "OBJECT",
+            "properties": {
+                "query": {
+                    "type": "STRING",
+                    "description": "The question or topic to find passages about."
+                },
+                "k": {
+                    "type": "INTEGER",
+                    "description": "Number of passages to return. Defaults to 5."
+                }
+            },
+            "required": ["query"]
+        }
+    }
+]
+
+
+# Registry manifest: how each tool is loaded and run (see `registry.register_tool`).
+# One at a time: a call may first extract and index newly downloaded PDFs.
+paper_text_tool_manifest = [
+    {
+        "name": "search_paper_text",
+        "implementation": "mcp_clients.paper_text:search_paper_text",
+        "max_concurrency": 1,
+        "timeout": 300,
+    },
+]
@@ -4,32 +4,131 @@ This file acts as the central registry for all MCP clients (tools).
 It does two things:
 1.  Defines the JSON schema for the tools, which we will send to Gemini.
 2.  Maps the tool names to the actual Python functions that implement them.
+
+Tools register into it with `register_tool`, together with metadata on how
+they must be run (blocking or async, max concurrency, timeout, caching). Each
+MCP client ships a declarative manifest in its `*_schema` module, listed in
+`plugins` below.
+
+Importing it is cheap: the schemas come from the lightweight `*_schema`
+modules and the implementations are `LazyTool`s, so the Google API client,
+selenium and BeautifulSoup are only imported when a tool is first called.
 """
-from . import google_calendar
-from . import semantic_scholar
-from . import google_scholar
+from typing import Optional
+
+from . import google_calendar_schema
+from . import semantic_scholar_schema
+from . import google_scholar_schema
+from . import federated_search_schema
+from . import paper_ranking_schema
+from . import similar_papers_schema
+from . import paper_text_schema
+from .lazy_tool import LazyTool
+from .tool_cache import CachedTool
+from .tool_runner import ToolRunner
 # from . import date_tools
 
+
+class ToolSpec:
+    """
+    A registered tool and how it must be run.
+
+    Args:
+        name: The tool name as known to Gemini.
+        implementation: "module:function" path (imported on first use).
+        schema: The Gemini function declaration.
+        blocking: True for plain functions (run in a thread pool), False for
+            `async def` implementations (awaited on the event loop).
+        max_concurrency: How many calls of this tool may run at once.
+        timeout: Seconds before a call is abandoned with an error result.
+        ttl: Seconds results are memoised (0 = not cacheable).
+        partial_ttl: Seconds partial results (`"partial": True`) are memoised.
+        invalidates: Cached read tools made stale by this (write) tool.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        implementation: str,
+        schema: dict,
+        blocking: bool = True,
+        max_concurrency: int = 4,
+        timeout: float = 60,
+        ttl: float = 0,
+        partial_ttl: float = 0,
+        invalidates: Optional[dict[str, list[str]]] = None,
+    ):
+        self.name = name
+        self.implementation = implementation
+        self.schema = schema
+        self.blocking = blocking
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.tool = CachedTool(
+            name, LazyTool(implementation), ttl=ttl, invalidates=invalidates, partial_ttl=partial_ttl
+        )
+
+    @property
+    def cacheable(self) -> bool:
+        return self.tool.ttl > 0
+
+
+tool_specs: dict[str, ToolSpec] = {}
+
 # 1. Define the tool implementations
 # This map tells our `main.py` which function to call for a given tool name.
-tool_implementations = {
-    "fetch_calendar_events": google_calendar.fetch_calendar_events,
-    "add_calendar_event": google_calendar.add_calendar_event,
-    # "search_papers": semantic_scholar.search_topic,
-    "web_search_query_by_page_id": google_scholar.web_search_query_by_page_id
-    # Add new MCP clients here, e.g.:
-    # "get_user_location": user_service.get_location,
-}
-
+tool_implementations: dict[str, CachedTool] = {}
 
 # 2. Define the tool schemas for Gemini
 # This is the "menu" we give to the AI so it knows what tools it can use.
 # This should be a flat list of function declaration objects.
 # The Python SDK will automatically wrap this in a Tool object.
 gemini_tool_definitions = []
-gemini_tool_definitions.extend(google_calendar.google_calendar_tool_definitions)
-# gemini_tool_definitions.extend(semantic_scholar.semantic_scholar_tool_definitions)
-gemini_tool_definitions.extend(google_scholar.gemini_google_gse_schema)
-    
 
 
+def register_tool(name: str, implementation: str, schema: dict, **options) -> ToolSpec:
+    """Registers a tool (see `ToolSpec` for the options)."""
+    if name in tool_specs:
+        raise ValueError(f"Tool '{name}' is already registered.")
+    spec = ToolSpec(name, implementation, schema, **options)
+    tool_specs[name] = spec
+    tool_implementations[name] = spec.tool
+    gemini_tool_definitions.append(schema)
+    return spec
+
+
+def register_plugin(tool_definitions: list[dict], manifest: list[dict]):
+    """Registers every tool of an MCP client from its schemas and manifest."""
+    schemas = {definition["name"]: definition for definition in tool_definitions}
+    for entry in manifest:
+        register_tool(schema=schemas[entry["name"]], **entry)
+
+
+# The MCP clients whose tools are offered to Gemini.
+plugins = [
+    (google_calendar_schema.google_calendar_tool_definitions,
+     google_calendar_schema.google_calendar_tool_manifest),
+    # (semantic_scholar_schema.semantic_scholar_tool_definitions,
+    #  semantic_scholar_schema.semantic_scholar_tool_manifest),
+    (google_scholar_schema.gemini_google_gse_schema,
+     google_scholar_schema.google_scholar_tool_manifest),
+    (federated_search_schema.federated_search_tool_definitions,
+     federated_search_schema.federated_search_tool_manifest),
+    (paper_ranking_schema.paper_ranking_tool_definitions,
+     paper_ranking_schema.paper_ranking_tool_manifest),
+    (similar_papers_schema.similar_papers_tool_definitions,
+     similar_papers_schema.similar_papers_tool_manifest),
+    (paper_text_schema.paper_text_tool_definitions,
+     paper_text_schema.paper_text_tool_manifest),
+    # Add new MCP clients here.
+]
+for _definitions, _manifest in plugins:
+    register_plugin(_definitions, _manifest)
+
+
+tool_runner = ToolRunner()
+
+
+async def run_tool(tool_name: str, tool_args: dict):
+    """Runs a registered tool from the router, enforcing its limits."""
+    return await tool_runner.run(tool_specs[tool_name], tool_args)
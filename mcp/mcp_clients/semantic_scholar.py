@@ -7,7 +7,18 @@ import json
 import semanticscholar as sch
 from semanticscholar.Paper import Paper # For type hinting
 import requests
-client = sch.SemanticScholar()
+from .semantic_scholar_schema import semantic_scholar_tool_definitions
+
+# Created on first use: building it at import slows down the server start.
+_client = None
+
+
+def get_client() -> sch.SemanticScholar:
+    global _client
+    if _client is None:
+        _client = sch.SemanticScholar()
+    return _client
+
 
 def search_papers(
     query: str,
@@ -55,7 +66,7 @@ def search_papers_by_query(query: str, limit: int = 5) -> str:
         # We specify fields_of_study=['Computer Science', 'Medicine', etc.] 
         # to get more relevant results, but for a general tool we can omit it.
         # We must request the fields we want, like 'abstract' and 'authors'.
-        search_results: list[Paper] = client.search_paper(
+        search_results: list[Paper] = get_client().search_paper(
             query, 
             limit=limit, 
             fields_of_study=[], # Empty list means search all fields
@@ -84,52 +95,6 @@ def search_papers_by_query(query: str, limit: int = 5) -> str:
         return json.dumps({"error": f"An error occurred while searching: {str(e)}"})
 
 
-semantic_scholar_tool_definitions = [
-    # {                                           # <-- ADD THIS ENTIRE BLOCK
-    #     "name": "search_papers",
-    #     "description": "Searches the Semantic Scholar database for academic papers based on a query.",
-    #     "parameters": {
-    #         "type": "OBJECT",
-    #         "properties": {
-    #             "query": {
-    #                 "type": "STRING",
-    #                 "description": "The search query (e.g., 'machine learning models for climate change', 'impact of LLMs on education')."
-    #             },
-    #             "limit": {
-    #                 "type": "INTEGER",
-    #                 "description": "The maximum number of paper results to return. Defaults to 5."
-    #             }
-    #         },
-    #         "required": ["query"]
-    #     }
-    # }
-    {
-        "name": "search_papers",
-        "description": "Searches the Semantic Scholar database for academic papers based on a query.",
-        "parameters": {
-            "type": "OBJECT",
-            "properties": {
-                "query": {
-                    "type": "STRING",
-                    "description": "The query to search for (e.g., 'machine learning', 'climate change')."
-                },
-                "limit": {
-                    "type": "INTEGER",
-                    "description": "The maximum number of paper results to return. Defaults to 10."
-                },
-                "offset": {
-                    "type": "INTEGER",
-                    "description": "The number of results to skip before starting to collect the result set. Defaults to 0."
-                },
-                "fields": {
-                    "type": "STRING",
-                    "description": "Comma-separated list of fields to include in the results (e.g., 'title,abstract,year'). Defaults to 'title,corpusId,abstract,tldr,year,referenceCount,citationCount,citationStyles,externalIds'."
-                }
-            },
-            "required": ["topic"]
-        }
-    }
-]
 if __name__ == '__main__':
     # Example for testing this module directly
     test_query = "large language models and healthcare"
@@ -0,0 +1,65 @@
+"""
+Gemini tool schemas of the Semantic Scholar MCP client.
+
+Kept apart from `semantic_scholar` so the registry can advertise the tools
+without importing the `semanticscholar` library.
+"""
+
+semantic_scholar_tool_definitions = [
+    # {                                           # <-- ADD THIS ENTIRE BLOCK
+    #     "name": "search_papers",
+    #     "description": "Searches the Semantic Scholar database for academic papers based on a query.",
+    #     "parameters": {
+    #         "type": "OBJECT",
+    #         "properties": {
+    #             "query": {
+    #                 "type": "STRING",
+    #                 "description": "The search query (e.g., 'machine learning models for climate change', 'impact of LLMs on education')."
+    #             },
+    #             "limit": {
+    #                 "type": "INTEGER",
+    #                 "description": "The maximum number of paper results to return. Defaults to 5."
+    #             }
+    #         },
+    #         "required": ["query"]
+    #     }
+    # }
+    {
+        "name": "search_papers",
+        "description": "Searches the Semantic Scholar database for academic papers based on a query.",
+        "parameters": {
+            "type": "OBJECT",
+            "properties": {
+                "query": {
+                    "type": "STRING",
+                    "description": "The query to search for (e.g., 'machine learning', 'climate change')."
+                },
+                "limit": {
+                    "type": "INTEGER",
+                    "description": "The maximum number of paper results to return. Defaults to 10."
+                },
+                "offset": {
+                    "type": "INTEGER",
+                    "description": "The number of results to skip before starting to collect the result set. Defaults to 0."
+                },
+                "fields": {
+                    "type": "STRING",
+                    "description": "Comma-separated list of fields to include in the results (e.g., 'title,abstract,year'). Defaults to 'title,corpusId,abstract,tldr,year,referenceCount,citationCount,citationStyles,externalIds'."
+                }
+            },
+            "required": ["topic"]
+        }
+    }
+]
+
+
+# Registry manifest: how each tool is loaded and run (see `registry.register_tool`).
+semantic_scholar_tool_manifest = [
+    {
+        "name": "search_papers",
+        "implementation": "mcp_clients.semantic_scholar:search_papers",
+        "max_concurrency": 2,
+        "timeout": 30,
+        "ttl": 24 * 60 * 60,
+    },
+]
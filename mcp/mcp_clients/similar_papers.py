@@ -0,0 +1,36 @@
+"""
+MCP Client for finding similar papers in the local embedding index.
+
+See `surveyor.embedding_index`. Each call first indexes the papers cached
+since the previous call (a no-op when the caches did not change).
+"""
+from surveyor.embedding_index import PaperEmbeddingIndex
+from surveyor.survey_export import normalise_doi
+
+# Loaded from disk on first use.
+_index = None
+
+
+def get_index() -> PaperEmbeddingIndex:
+    global _index
+    if _index is None:
+        _index = PaperEmbeddingIndex()
+    return _index
+
+
+def find_similar_papers(text=None, doi=None, k=10) -> dict:
+    print(f"  [MCP Tool] find_similar_papers text={(text or '')[:60]!r} doi={doi!r} k={k}")
+    if not text and not doi:
+        return {"error": "Give either 'text' or 'doi'."}
+    if doi and not normalise_doi(doi):
+        return {"error": f"'{doi}' is not a DOI."}
+    index = get_index()
+    index.refresh()
+    try:
+        if doi:
+            results = index.similar(paper_key=f"doi:{normalise_doi(doi)}", k=int(k))
+        else:
+            results = index.similar(text=text, k=int(k))
+    except KeyError as e:
+        return {"error": f"{e.args[0]}: fetch it first, or search by text."}
+    return {"papers_indexed": len(index.papers), "results": results}
@@ -0,0 +1,43 @@
+"""
+Gemini tool schemas of the similar papers MCP client.
+
+Kept apart from `similar_papers` so the registry can advertise the tool
+without importing NumPy and the embedding index.
+"""
+
+similar_papers_tool_definitions = [
+    {
+        "name": "find_similar_papers",
+        "description": "Finds the collected survey papers most similar to a text (topic, abstract, question) or to a known paper given by DOI. Uses a local index: no web search, answers in milliseconds.",
+        "parameters": {
+            "type": "OBJECT",
+            "properties": {
+                "text": {
+                    "type": "STRING",
+                    "description": "Text to compare the papers with (e.g. an abstract or a research question)."
+                },
+                "doi": {
+                    "type": "STRING",
+                    "description": "DOI of a collected paper; returns the papers most similar to it."
+                },
+                "k": {
+                    "type": "INTEGER",
+                    "description": "Number of papers to return. Defaults to 10."
+                }
+            },
+            "required": []
+        }
+    }
+]
+
+
+# Registry manifest: how each tool is loaded and run (see `registry.register_tool`).
+# One at a time: a call may first index newly cached papers.
+similar_papers_tool_manifest = [
+    {
+        "name": "find_similar_papers",
+        "implementation": "mcp_clients.similar_papers:find_similar_papers",
+        "max_concurrency": 1,
+        "timeout": 120,
+    },
+]
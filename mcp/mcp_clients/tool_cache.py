@@ -0,0 +1,172 @@
+"""
+Memoisation of read-only MCP tools.
+
+The registry wraps each tool implementation with `CachedTool`:
+- read-only tools are memoised by their normalised arguments for `ttl` seconds,
+- write tools are never cached, but invalidate the cached results of the read
+  tools they affect (e.g. `add_calendar_event(date=X)` drops the cached
+  `fetch_calendar_events(date=X)`).
+
+Results that look like errors (`{"error": ...}`) are never cached. Results
+marked incomplete (`{"partial": True, ...}`, e.g. a source timed out) are
+kept for `partial_ttl` seconds only, so a later call can fill them in.
+"""
+import json
+import time
+import inspect
+import threading
+from typing import Callable, Optional
+
+import tracing
+
+
+def _normalise_value(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float) and value.is_integer():
+        # Gemini sends INTEGER arguments as floats (e.g. page_num=1.0).
+        return int(value)
+    return value
+
+
+class ToolResultCache:
+    """Thread-safe store of tool results keyed by tool name and arguments."""
+
+    def __init__(self):
+        self._entries: dict[str, dict[str, tuple[float, dict, object]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(args: dict) -> str:
+        return json.dumps(args, sort_keys=True, default=str)
+
+    def get(self, tool_name: str, key: str):
+        """Returns `(True, result)` on a hit, `(False, None)` otherwise."""
+        with self._lock:
+            entry = self._entries.get(tool_name, {}).get(key)
+            if entry and entry[0] > time.time():
+                self.stats["hits"] += 1
+                return True, entry[2]
+            self.stats["misses"] += 1
+            return False, None
+
+    def set(self, tool_name: str, key: str, args: dict, result, ttl: float):
+        with self._lock:
+            self._entries.setdefault(tool_name, {})[key] = (time.time() + ttl, args, result)
+
+    def invalidate(self, tool_name: str, match_args: Optional[dict] = None):
+        """
+        Drops cached results of `tool_name`.
+
+        With `match_args`, only entries whose arguments contain those values
+        are dropped; without, the whole tool is cleared.
+        """
+        with self._lock:
+            entries = self._entries.get(tool_name, {})
+            for key in list(entries):
+                args = entries[key][1]
+                if not match_args or all(args.get(k) == v for k, v in match_args.items()):
+                    del entries[key]
+                    self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by all wrapped tools.
+tool_result_cache = ToolResultCache()
+
+
+class CachedTool:
+    """
+    Callable wrapper around a tool implementation.
+
+    Args:
+        name: The tool name as known to Gemini.
+        func: The implementation (a function or a `LazyTool`).
+        ttl: Seconds a result stays valid. 0 disables memoisation.
+        partial_ttl: Seconds a partial result stays valid (0 = not cached).
+        invalidates: For write tools, `{read_tool_name: [arg names]}`. After a
+            call, cached results of `read_tool_name` whose listed arguments
+            equal this call's arguments are dropped (an empty list drops all).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        ttl: float = 0,
+        invalidates: Optional[dict[str, list[str]]] = None,
+        cache: ToolResultCache = tool_result_cache,
+        partial_ttl: float = 0,
+    ):
+        self.name = name
+        self.func = func
+        self.ttl = ttl
+        self.partial_ttl = min(partial_ttl, ttl)
+        self.invalidates = invalidates or {}
+        self.cache = cache
+        self._signature = None
+
+    @property
+    def signature(self) -> inspect.Signature:
+        # Resolved on first call: `func` may be a `LazyTool` whose module is
+        # not imported yet.
+        if self._signature is None:
+            self._signature = getattr(self.func, "signature", None) or inspect.signature(self.func)
+        return self._signature
+
+    def normalise_args(self, args: tuple, kwargs: dict) -> dict:
+        """Binds the call to the signature so equivalent calls share a key."""
+        try:
+            bound = self.signature.bind(*args, **kwargs)
+        except TypeError:
+            return {k: _normalise_value(v) for k, v in kwargs.items()}
+        bound.apply_defaults()
+        return {k: _normalise_value(v) for k, v in bound.arguments.items()}
+
+    def _lookup(self, call_args: dict):
+        """Returns `(key, hit, result)` for a normalised call."""
+        if self.ttl <= 0:
+            return None, False, None
+        key = self.cache.make_key(call_args)
+        hit, result = self.cache.get(self.name, key)
+        tracing.record_cache("tool", hit)
+        if hit:
+            print(f"  [Tool Cache] Hit for {self.name}({call_args})")
+        return key, hit, result
+
+    def _after_call(self, key, call_args: dict, result):
+        is_error = isinstance(result, dict) and "error" in result
+        ttl = self.partial_ttl if isinstance(result, dict) and result.get("partial") else self.ttl
+        if ttl > 0 and not is_error:
+            self.cache.set(self.name, key, call_args, result, ttl)
+
+        for read_tool, arg_names in self.invalidates.items():
+            match_args = {name: call_args.get(name) for name in arg_names}
+            self.cache.invalidate(read_tool, match_args)
+
+    def __call__(self, *args, **kwargs):
+        call_args = self.normalise_args(args, kwargs)
+        key, hit, result = self._lookup(call_args)
+        if hit:
+            return result
+        result = self.func(*args, **kwargs)
+        self._after_call(key, call_args, result)
+        return result
+
+    async def acall(self, *args, **kwargs):
+        """Same as calling the tool, for `async def` implementations."""
+        call_args = self.normalise_args(args, kwargs)
+        key, hit, result = self._lookup(call_args)
+        if hit:
+            return result
+        result = await self.func(*args, **kwargs)
+        self._after_call(key, call_args, result)
+        return result
+
+    def invalidate(self, **match_args):
+        """Drops cached results of this tool (optionally only matching ones)."""
+        self.cache.invalidate(self.name, match_args or None)
@@ -0,0 +1,88 @@
+"""
+Executes registered tools from the async router with per-tool limits.
+
+Each tool gets:
+- an `asyncio.Semaphore` of `max_concurrency`, so a burst of calls (e.g. many
+  `web_search_query_by_page_id`, each launching a browser) queues instead of
+  starting dozens of browsers at once;
+- for blocking tools, a dedicated `ThreadPoolExecutor` of the same size, so a
+  slow tool never blocks the event loop nor starves the other tools;
+- a timeout, after which the router gets an error result instead of hanging.
+
+A timed-out blocking call cannot be interrupted: its thread keeps running
+until the function returns, but the executor size still bounds how many of
+them exist.
+"""
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+
+class ToolRunner:
+    """Runs `ToolSpec`s (see `registry.register_tool`) with their limits."""
+
+    def __init__(self):
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self.stats: dict[str, dict] = {}
+
+    def _semaphore(self, spec) -> asyncio.Semaphore:
+        if spec.name not in self._semaphores:
+            self._semaphores[spec.name] = asyncio.Semaphore(spec.max_concurrency)
+        return self._semaphores[spec.name]
+
+    def _executor(self, spec) -> ThreadPoolExecutor:
+        if spec.name not in self._executors:
+            self._executors[spec.name] = ThreadPoolExecutor(
+                max_workers=spec.max_concurrency, thread_name_prefix=f"tool-{spec.name}"
+            )
+        return self._executors[spec.name]
+
+    def _record(self, name: str, outcome: str, seconds: float):
+        stats = self.stats.setdefault(name, {"ok": 0, "error": 0, "timeout": 0, "seconds": 0.0})
+        stats[outcome] += 1
+        stats["seconds"] += seconds
+
+    async def run(self, spec, tool_args: dict):
+        """Runs one call of `spec` and returns its result (or an error dict)."""
+        semaphore = self._semaphore(spec)
+        if semaphore.locked():
+            print(f"  [Tool Runner] {spec.name} at its concurrency limit "
+                  f"({spec.max_concurrency}), waiting...")
+
+        async with semaphore:
+            with tracing.span("tool", tool=spec.name):
+                started = time.perf_counter()
+                try:
+                    if spec.blocking:
+                        loop = asyncio.get_running_loop()
+                        # Copy the context so the tool's spans and cache hits are
+                        # attributed to the current request trace.
+                        context = contextvars.copy_context()
+                        call = loop.run_in_executor(
+                            self._executor(spec),
+                            functools.partial(context.run, spec.tool, **tool_args)
+                        )
+                    else:
+                        call = spec.tool.acall(**tool_args)
+                    result = await asyncio.wait_for(call, timeout=spec.timeout)
+                except asyncio.TimeoutError:
+                    self._record(spec.name, "timeout", time.perf_counter() - started)
+                    tracing.annotate(timeout=True)
+                    print(f"  [Tool Runner] {spec.name} timed out after {spec.timeout}s")
+                    return {"error": f"Tool '{spec.name}' timed out after {spec.timeout} seconds."}
+                except Exception:
+                    self._record(spec.name, "error", time.perf_counter() - started)
+                    raise
+
+        self._record(spec.name, "ok", time.perf_counter() - started)
+        return result
+
+    def shutdown(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executors.clear()
@@ -0,0 +1,170 @@
+"""
+Pluggable model backends for the chat routers.
+
+The routers only talk to a `ModelBackend`:
+- `GeminiBackend` calls the real API through `gemini_client`.
+- `MockBackend` is a deterministic local stand-in with configurable latency
+  and scripted function calls, used for load tests and offline development.
+
+The backend is chosen with the `MODEL_BACKEND` environment variable
+(`gemini`, the default, or `mock`). Mock settings: `MOCK_LATENCY_MS`,
+`MOCK_JITTER_MS`.
+
+Mock script: a prompt containing `[tool:NAME key=value ...]` makes the mock
+answer with a function call to NAME with those arguments; once the tool
+result is in the contents, it answers with a text summarising it. Any other
+prompt gets a direct text answer.
+"""
+import os
+import re
+import json
+import time
+import random
+import hashlib
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_TOOL_MARKER_RE = re.compile(r"\[tool:(\w+)((?:\s+\w+=[^\s\]]+)*)\s*\]")
+
+
+class ModelBackend:
+    """Interface of a model backend (payloads and responses as dicts)."""
+
+    name = "base"
+
+    def generate(self, payload: dict) -> dict:
+        """Same contract as `gemini_client.call_gemini_api`."""
+        raise NotImplementedError
+
+    def embed(self, text: str) -> list[float]:
+        raise NotImplementedError
+
+
+class GeminiBackend(ModelBackend):
+    """The real Gemini API (imported lazily so the mock needs no API key)."""
+
+    name = "gemini"
+
+    def generate(self, payload: dict) -> dict:
+        from gemini_client import call_gemini_api
+        return call_gemini_api(payload)
+
+    def embed(self, text: str) -> list[float]:
+        from gemini_client import embed_text
+        return embed_text(text)
+
+
+def _parse_value(value: str):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+class MockBackend(ModelBackend):
+    """
+    Deterministic local model.
+
+    Args:
+        latency_ms: Time each `generate` call takes (blocking, like the SDK).
+        jitter_ms: Random extra latency in `[0, jitter_ms]` (seeded).
+        seed: Seed of the jitter.
+    """
+
+    name = "mock"
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    @staticmethod
+    def _part_dict(part) -> dict:
+        if hasattr(part, "model_dump"):
+            return part.model_dump(exclude_none=True)
+        return part
+
+    @staticmethod
+    def _response(part: dict, prompt_tokens: int, output_tokens: int) -> dict:
+        # Same shape as `GenerateContentResponse.model_dump()`.
+        full_part = {"function_call": None, "function_response": None, "text": None, **part}
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": [full_part]},
+                "finish_reason": "STOP",
+            }],
+            "usage_metadata": {
+                "prompt_token_count": prompt_tokens,
+                "candidates_token_count": output_tokens,
+                "cached_content_token_count": None,
+            },
+        }
+
+    def generate(self, payload: dict) -> dict:
+        self.calls += 1
+        delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+
+        contents = payload.get("contents") or []
+        prompt_tokens = len(json.dumps(contents, default=str)) // 4 + 1
+        last = contents[-1] if contents else {}
+        last_parts = [self._part_dict(p) for p in last.get("parts", [])]
+
+        # 2nd call: synthesise the tool result.
+        for part in last_parts:
+            fr = part.get("function_response")
+            if fr:
+                result = json.dumps((fr.get("response") or {}).get("result"), default=str)
+                text = f"Mock answer based on {fr.get('name')}: {result[:200]}"
+                return self._response({"text": text}, prompt_tokens, len(text) // 4 + 1)
+
+        prompt = " ".join(p.get("text") or "" for p in last_parts)
+        match = _TOOL_MARKER_RE.search(prompt)
+        if match and payload.get("tools"):
+            args = {}
+            for pair in match.group(2).split():
+                key, _, value = pair.partition("=")
+                args[key] = _parse_value(value)
+            call = {"function_call": {"name": match.group(1), "args": args}}
+            return self._response(call, prompt_tokens, 10)
+
+        text = f"Mock answer to: {prompt[:200]}"
+        return self._response({"text": text}, prompt_tokens, len(text) // 4 + 1)
+
+    def embed(self, text: str) -> list[float]:
+        # Deterministic pseudo-embedding: 32 floats derived from the text hash.
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [b / 255.0 for b in digest]
+
+
+_backend: Optional[ModelBackend] = None
+
+
+def create_backend(name: Optional[str] = None) -> ModelBackend:
+    name = (name or os.getenv("MODEL_BACKEND", "gemini")).lower()
+    if name == "mock":
+        return MockBackend(
+            latency_ms=float(os.getenv("MOCK_LATENCY_MS", "0")),
+            jitter_ms=float(os.getenv("MOCK_JITTER_MS", "0")),
+        )
+    if name == "gemini":
+        return GeminiBackend()
+    raise ValueError(f"Unknown MODEL_BACKEND '{name}' (expected 'gemini' or 'mock').")
+
+
+def get_backend() -> ModelBackend:
+    """Returns the process-wide backend selected by `MODEL_BACKEND`."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: ModelBackend):
+    """Replaces the process-wide backend (e.g. from a load test)."""
+    global _backend
+    _backend = backend
@@ -0,0 +1,173 @@
+"""
+Response cache for the chat router.
+
+Users often repeat the same questions ("any events for 2025-10-27", the same
+paper search). A cache hit returns the previous answer and skips both Gemini
+calls and the tool execution.
+
+Two tiers:
+1.  Exact match on the normalised prompt (lower-cased, collapsed whitespace).
+2.  Optional embedding similarity (`RESPONSE_CACHE_SEMANTIC=true`). Prompts
+    must also contain the same numbers (dates, page numbers, ...) so that
+    "events for 2025-10-27" never answers "events for 2025-10-28".
+
+Entries expire according to the tool that produced them: calendar answers go
+stale quickly, paper searches stay valid for a long time. Write tools are
+never cached and invalidate the answers of the tools they affect.
+"""
+import os
+import re
+import math
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_SEMANTIC = os.getenv("RESPONSE_CACHE_SEMANTIC", "false").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.93"))
+
+# TTL (seconds) of a cached answer, by the tool that was called to produce it.
+# A TTL of 0 means the answer is never cached.
+TOOL_TTLS = {
+    None: 10 * 60,  # answered directly by the model
+    "fetch_calendar_events": 60,
+    "fetch_calendar_events_range": 60,
+    "add_calendar_event": 0,
+    "add_calendar_events": 0,
+    "search_papers": 24 * 60 * 60,
+    "web_search_query_by_page_id": 24 * 60 * 60,
+}
+DEFAULT_TTL = 5 * 60
+
+# Write tools -> read tools whose cached answers they make stale.
+TOOL_INVALIDATES = {
+    "add_calendar_event": ["fetch_calendar_events", "fetch_calendar_events_range"],
+    "add_calendar_events": ["fetch_calendar_events", "fetch_calendar_events_range"],
+}
+
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def normalise_prompt(prompt: str) -> str:
+    return " ".join(prompt.lower().split())
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(normalise_prompt(prompt).encode("utf-8")).hexdigest()
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of chat answers.
+
+    `embed` is a callable turning text into a vector; it is only used when
+    the semantic tier is enabled.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        embed: Optional[Callable[[str], list[float]]] = None,
+        semantic: bool = RESPONSE_CACHE_SEMANTIC,
+        similarity: float = RESPONSE_CACHE_SIMILARITY,
+    ):
+        self.max_entries = max_entries
+        self.embed = embed
+        self.semantic = semantic and embed is not None
+        self.similarity = similarity
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    def _embed(self, prompt: str) -> Optional[list[float]]:
+        try:
+            return self.embed(normalise_prompt(prompt))
+        except Exception as e:
+            print(f"  [Cache] Embedding failed, semantic tier skipped: {e}")
+            return None
+
+    def _evict_expired(self, now: float):
+        for key in [k for k, e in self._entries.items() if e["expires_at"] <= now]:
+            del self._entries[key]
+
+    def get(self, prompt: str) -> Optional[dict]:
+        """Returns the cached entry for `prompt`, or None on a miss."""
+        key = prompt_key(prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["expires_at"] > now:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return {**entry, "match": "exact"}
+
+        if self.semantic:
+            vector = self._embed(prompt)
+            numbers = _NUMBER_RE.findall(prompt)
+            if vector is not None:
+                with self._lock:
+                    best, best_score = None, self.similarity
+                    for candidate in self._entries.values():
+                        if candidate["expires_at"] <= now or candidate["vector"] is None:
+                            continue
+                        if candidate["numbers"] != numbers:
+                            continue
+                        score = _cosine(vector, candidate["vector"])
+                        if score >= best_score:
+                            best, best_score = candidate, score
+                    if best is not None:
+                        self.stats["semantic_hits"] += 1
+                        return {**best, "match": "semantic", "similarity": best_score}
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, prompt: str, response: str, debug_info: dict):
+        """Stores an answer, using the TTL of the tool that produced it."""
+        tool_name = debug_info.get("tool_called")
+        self.record_tool_call(tool_name)
+
+        ttl = TOOL_TTLS.get(tool_name, DEFAULT_TTL)
+        if ttl <= 0:
+            return
+        vector = self._embed(prompt) if self.semantic else None
+        now = time.time()
+        with self._lock:
+            self._entries[prompt_key(prompt)] = {
+                "response": response,
+                "debug_info": debug_info,
+                "tool_called": tool_name,
+                "numbers": _NUMBER_RE.findall(prompt),
+                "vector": vector,
+                "expires_at": now + ttl,
+            }
+            self._evict_expired(now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_tool_call(self, tool_name: Optional[str]):
+        """Invalidates the answers made stale by a (write) tool call."""
+        for stale_tool in TOOL_INVALIDATES.get(tool_name, []):
+            self.invalidate_tool(stale_tool)
+
+    def invalidate_tool(self, tool_name: str):
+        """Drops every cached answer produced by `tool_name`."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e["tool_called"] == tool_name]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
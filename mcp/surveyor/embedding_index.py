@@ -0,0 +1,381 @@
+"""
+Local embedding index of the survey papers, for "find similar papers".
+
+Abstracts (and titles) from the caches (see `survey_export`) are embedded in
+batches on the CPU and stored in an approximate nearest-neighbour index, all
+on disk under `.data/index/papers`, so a query never touches the network.
+
+- Embedder: `HashingEmbedder` (default, NumPy only) hashes word unigrams and
+  bigrams into a fixed-size, L2-normalised vector. With EMBEDDING_MODEL set
+  and `sentence-transformers` installed (model files already downloaded),
+  that model is used instead.
+- Index: `IVFIndex`, an inverted-file index. Vectors are clustered with
+  spherical k-means; a query scans only the `nprobe` closest clusters.
+  Below IVF_MIN_SIZE vectors an exact scan is used (faster at that size).
+- Incremental: `refresh()` only rescans the caches when one of their files
+  changed (size or mtime), and upserts by paper key: new papers and papers
+  whose text changed are embedded, the stored fields of the others are
+  updated, and papers no longer in the caches (e.g. their key changed when
+  a DOI was merged in) are removed. New vectors join their closest cluster;
+  clusters are retrained once the index has grown 4x since the last training.
+
+`ChunkEmbeddingIndex` indexes the full-text chunks of the downloaded PDFs
+(see `pdf_chunks`) the same way, under `.data/index/chunk_vectors`.
+"""
+import os
+import json
+import zlib
+import hashlib
+import threading
+from typing import Iterator, Optional
+
+import numpy as np
+
+from surveyor.survey_export import (
+    BULK_DIR, GCSE_RESULTS_DIR, SEMANTIC_DIR, SEMANTIC_SEARCH_DIR, dedupe, iter_cached_papers,
+)
+from surveyor.ranking import TOKEN_RE
+
+INDEX_DIR = ".data/index/papers"
+CHUNK_INDEX_DIR = ".data/index/chunk_vectors"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
+HASHING_DIM = 512
+IVF_MIN_SIZE = 5000
+IVF_NPROBE = 8
+RETRAIN_GROWTH = 4
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 20000
+EMBED_BATCH = 256
+# Paper fields kept next to the vectors to answer without the caches.
+META_FIELDS = ("paper_key", "title", "doi", "year", "citation_count", "url")
+CHUNK_META_FIELDS = ("chunk_id", "pdf", "page", "title", "doi", "paper_key")
+CHUNK_PREVIEW_CHARS = 500
+
+
+class HashingEmbedder:
+    """Feature hashing of unigrams and bigrams (sublinear tf, signed buckets)."""
+
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> list[str]:
+        words = TOKEN_RE.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        rows, cols, signs = [], [], []
+        for i, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                rows.append(i)
+                cols.append(h % self.dim)
+                signs.append(1.0 if h & 0x80000000 else -1.0)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(vectors, (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)), signs)
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class SentenceTransformerEmbedder:
+    """A local sentence-transformers model (must already be downloaded)."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(
+            texts, batch_size=EMBED_BATCH, normalize_embeddings=True, show_progress_bar=False
+        ).astype(np.float32)
+
+
+def get_embedder():
+    if EMBEDDING_MODEL:
+        try:
+            return SentenceTransformerEmbedder(EMBEDDING_MODEL)
+        except Exception as e:
+            print(f"[Embedding] Cannot load {EMBEDDING_MODEL} ({e}), using the hashing embedder.")
+    return HashingEmbedder()
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = KMEANS_ITERATIONS,
+                     seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    if len(vectors) > KMEANS_SAMPLE:
+        vectors = vectors[rng.choice(len(vectors), KMEANS_SAMPLE, replace=False)]
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Empty clusters keep their previous centroid.
+        centroids = np.where(empty[:, None], centroids, sums / np.where(norms == 0, 1, norms))
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """Inverted-file ANN index over L2-normalised vectors (cosine similarity)."""
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.centroids: Optional[np.ndarray] = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.trained_size = 0
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def train(self):
+        n_clusters = max(1, int(np.sqrt(len(self.vectors))))
+        self.centroids = spherical_kmeans(self.vectors, n_clusters)
+        self.assign = np.argmax(self.vectors @ self.centroids.T, axis=1).astype(np.int32)
+        self.trained_size = len(self.vectors)
+        print(f"[Embedding] IVF trained: {n_clusters} clusters over {self.trained_size} vectors")
+
+    def update(self, rows: np.ndarray, vectors: np.ndarray):
+        """Replaces the vectors of `rows` (re-assigned to their closest cluster)."""
+        self.vectors[rows] = vectors
+        if self.centroids is not None and len(self.assign) == len(self.vectors):
+            self.assign[rows] = np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def remove(self, rows: np.ndarray):
+        """Deletes the vectors of `rows`; the rows after them move up."""
+        keep = np.ones(len(self.vectors), dtype=bool)
+        keep[rows] = False
+        self.vectors = self.vectors[keep]
+        if len(self.assign) == len(keep):
+            self.assign = self.assign[keep]
+
+    def add(self, vectors: np.ndarray):
+        self.vectors = np.concatenate([self.vectors, vectors.astype(np.float32)])
+        if len(self.vectors) < IVF_MIN_SIZE:
+            return
+        if self.centroids is None or len(self.vectors) >= RETRAIN_GROWTH * self.trained_size:
+            self.train()
+        else:
+            new = np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+            self.assign = np.concatenate([self.assign, new])
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = IVF_NPROBE) -> tuple[np.ndarray, np.ndarray]:
+        """(row ids, similarities) of the k nearest vectors, best first."""
+        if self.centroids is None or len(self.assign) != len(self.vectors):
+            candidates = np.arange(len(self.vectors))
+        else:
+            probe = np.argsort(-(self.centroids @ query))[:nprobe]
+            candidates = np.flatnonzero(np.isin(self.assign, probe))
+        scores = self.vectors[candidates] @ query
+        k = min(k, len(candidates))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return candidates[top], scores[top]
+
+
+def paper_text(paper: dict) -> str:
+    return f"{paper.get('title') or ''}. {paper.get('abstract') or ''}"
+
+
+class PaperEmbeddingIndex:
+    """The persisted index of the cached papers."""
+
+    # Field identifying an item, and the fields stored with its vector.
+    key = "paper_key"
+    meta_fields = META_FIELDS
+
+    def __init__(self, directory: str = INDEX_DIR, embedder=None):
+        self.directory = directory
+        self.embedder = embedder or get_embedder()
+        self.papers: list[dict] = []
+        # Hash of the embedded text of each paper, to re-embed the changed ones.
+        self.text_hashes: list[Optional[int]] = []
+        self.positions: dict[str, int] = {}
+        self.index: Optional[IVFIndex] = None
+        self.signature = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        try:
+            with open(self._path("meta.json"), "r", encoding="utf-8") as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            meta = None
+        if not meta or meta["embedder"] != self.embedder.name:
+            return
+        index = IVFIndex(meta["dim"])
+        index.vectors = np.load(self._path("vectors.npy"))
+        if meta["trained_size"]:
+            index.centroids = np.load(self._path("centroids.npy"))
+            index.assign = np.load(self._path("assign.npy"))
+            index.trained_size = meta["trained_size"]
+        self.index = index
+        self.papers = meta["papers"]
+        self.text_hashes = meta.get("text_hashes") or [None] * len(self.papers)
+        self.positions = {paper[self.key]: i for i, paper in enumerate(self.papers)}
+        self.signature = meta["signature"]
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        np.save(self._path("vectors.npy"), self.index.vectors)
+        if self.index.centroids is not None:
+            np.save(self._path("centroids.npy"), self.index.centroids)
+            np.save(self._path("assign.npy"), self.index.assign)
+        meta = {
+            "embedder": self.embedder.name,
+            "dim": int(self.index.vectors.shape[1]),
+            "trained_size": self.index.trained_size if self.index.centroids is not None else 0,
+            "signature": self.signature,
+            "papers": self.papers,
+            "text_hashes": self.text_hashes,
+        }
+        # meta.json is written last: a crash before it leaves the previous index valid.
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        os.replace(tmp, self._path("meta.json"))
+
+    def iter_items(self) -> Iterator[dict]:
+        """Every item that should be indexed; indexed items missing from it are removed."""
+        return dedupe(iter_cached_papers())
+
+    def item_text(self, item: dict) -> str:
+        return paper_text(item)
+
+    def item_meta(self, item: dict) -> dict:
+        return {field: item.get(field) for field in self.meta_fields}
+
+    @staticmethod
+    def cache_signature() -> str:
+        """Changes whenever a cache file is added, removed or rewritten (size or mtime)."""
+        digest = hashlib.sha1()
+        for directory, pattern in ((SEMANTIC_DIR, ".json"), (SEMANTIC_SEARCH_DIR, ".json"),
+                                   (GCSE_RESULTS_DIR, ".json"), (BULK_DIR, ".jsonl")):
+            try:
+                entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.endswith(pattern):
+                    stat = entry.stat()
+                    digest.update(f"{entry.path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _embed(self, items: list[dict]) -> Iterator[tuple[list[dict], np.ndarray]]:
+        for start in range(0, len(items), EMBED_BATCH):
+            batch = items[start:start + EMBED_BATCH]
+            yield batch, self.embedder.embed([self.item_text(item) for item in batch])
+
+    def refresh(self) -> int:
+        """
+        Brings the index in line with `iter_items()`: embeds the new and
+        changed items, updates the stored fields of the others and removes
+        the items that are gone. Returns how many items were embedded.
+        """
+        with self._lock:
+            signature = self.cache_signature()
+            if signature == self.signature:
+                return 0
+            items = {}
+            for item in self.iter_items():
+                text = self.item_text(item)
+                if text.strip(" ."):
+                    items[item[self.key]] = (item, zlib.crc32(text.encode("utf-8")))
+
+            removed = [key for key in self.positions if key not in items]
+            if removed:
+                rows = sorted(self.positions[key] for key in removed)
+                self.index.remove(np.array(rows, dtype=np.int64))
+                gone = set(rows)
+                self.papers = [paper for i, paper in enumerate(self.papers) if i not in gone]
+                self.text_hashes = [h for i, h in enumerate(self.text_hashes) if i not in gone]
+                self.positions = {paper[self.key]: i for i, paper in enumerate(self.papers)}
+
+            new, changed = [], []
+            for key, (item, text_hash) in items.items():
+                row = self.positions.get(key)
+                if row is None:
+                    new.append(item)
+                    continue
+                self.papers[row] = self.item_meta(item)
+                if self.text_hashes[row] != text_hash:
+                    changed.append(item)
+                    self.text_hashes[row] = text_hash
+
+            for batch, vectors in self._embed(changed):
+                self.index.update(np.array([self.positions[item[self.key]] for item in batch]), vectors)
+            for batch, vectors in self._embed(new):
+                if self.index is None:
+                    self.index = IVFIndex(vectors.shape[1])
+                self.index.add(vectors)
+                for item in batch:
+                    self.positions[item[self.key]] = len(self.papers)
+                    self.papers.append(self.item_meta(item))
+                    self.text_hashes.append(items[item[self.key]][1])
+            self.signature = signature
+            if self.index is not None:
+                self._save()
+            if new or changed or removed:
+                print(f"[Embedding] Indexed {len(new)} new, re-embedded {len(changed)} and removed "
+                      f"{len(removed)} {self.key.split('_')[0]}s ({len(self.papers)} in total)")
+            return len(new) + len(changed)
+
+    def similar(self, text: Optional[str] = None, paper_key: Optional[str] = None, k: int = 10) -> list[dict]:
+        """Papers closest to `text`, or to the indexed paper `paper_key` (excluded)."""
+        if self.index is None or not len(self.index):
+            return []
+        if paper_key is not None:
+            if paper_key not in self.positions:
+                raise KeyError(f"Paper '{paper_key}' is not indexed")
+            query = self.index.vectors[self.positions[paper_key]]
+        else:
+            query = self.embedder.embed([text or ""])[0]
+        rows, scores = self.index.search(query, k + (1 if paper_key else 0))
+        results = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            paper = self.papers[row]
+            if paper[self.key] == paper_key:
+                continue
+            results.append({**paper, "similarity": round(float(score), 4)})
+        return results[:k]
+
+
+class ChunkEmbeddingIndex(PaperEmbeddingIndex):
+    """The persisted index of the full-text chunks of the downloaded PDFs."""
+
+    key = "chunk_id"
+    meta_fields = CHUNK_META_FIELDS
+
+    def __init__(self, directory: str = CHUNK_INDEX_DIR, embedder=None, store=None):
+        from surveyor.pdf_chunks import ChunkStore
+
+        self.store = store or ChunkStore()
+        super().__init__(directory, embedder)
+
+    def cache_signature(self):
+        return self.store.signature()
+
+    def iter_items(self) -> Iterator[dict]:
+        from surveyor.pdf_chunks import papers_by_pdf_name
+
+        papers = papers_by_pdf_name()
+        for chunk in self.store.iter_chunks():
+            paper = papers.get(chunk["pdf"][:-len(".pdf")]) or {}
+            yield {**chunk, "title": paper.get("title"), "doi": paper.get("doi"), "paper_key": paper.get("paper_key")}
+
+    def item_text(self, item: dict) -> str:
+        return item["text"]
+
+    def item_meta(self, item: dict) -> dict:
+        meta = super().item_meta(item)
+        meta["preview"] = item["text"][:CHUNK_PREVIEW_CHARS]
+        return meta
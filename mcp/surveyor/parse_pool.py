@@ -0,0 +1,158 @@
+"""
+Publisher pages fetched on threads, parsed in worker processes.
+
+Parsing a page (`Provider.get_soup`) and extracting from it are CPU-bound
+and hold the GIL, so a pool of fetch threads stops scaling as soon as pages
+arrive: the threads queue up behind the parser. `ParsePool` keeps the I/O
+on threads (cache reads, requests, pooled browsers) and ships the raw HTML
+bytes to a process pool, which parses the page and returns only the small
+extracted record (title, DOI, abstract). Parsing then scales with cores.
+
+Usage:
+    from surveyor.parse_pool import parse_pool
+    parse_pool.extract("https://arxiv.org/abs/2401.00001")
+    parse_pool.extract_many(links, fetch_mode="requests")
+"""
+import os
+import time
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from surveyor.providers import get_provider
+from surveyor.utils.browser_pool import browser_pool
+from surveyor.utils.instrumentation import provider_stats, get_domain
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 2)))
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))
+EXTRACTED_FIELDS = ("title", "abstract", "doi")
+
+
+def extract_page(provider_name: str, url: str, html: bytes) -> dict:
+    """Runs in a worker process: parses `html` with the provider and extracts its fields."""
+    from surveyor import providers
+
+    start = time.perf_counter()
+    # The stage timings (parse, extract_*) are recorded in this process: they
+    # are returned with the record and replayed in the server's stats.
+    with provider_stats.capture() as stats:
+        prv = getattr(providers, provider_name).from_html(url, html.decode("utf-8", errors="replace"))
+        record = {"provider": provider_name, "url": url}
+        for field in EXTRACTED_FIELDS:
+            try:
+                record[field] = getattr(prv, f"get_{field}")()
+            except Exception as e:
+                record[field] = None
+                record.setdefault("errors", {})[field] = str(e)
+    record["stats"] = stats + [(provider_name, get_domain(url), "process_parse", time.perf_counter() - start, True)]
+    return record
+
+
+class ParsePool:
+    """
+    Args:
+        workers: Parsing processes (started on first use).
+        fetch_workers: Threads fetching pages at once.
+    """
+
+    def __init__(self, workers: int = PARSE_WORKERS, fetch_workers: int = FETCH_WORKERS):
+        self.workers = workers
+        self._fetchers = ThreadPoolExecutor(fetch_workers, thread_name_prefix="page-fetch")
+        # Browser fetches get their own threads, as many as there are pooled
+        # browsers: waiting for a browser must not hold up plain HTTP fetches.
+        self._browser_fetchers = ThreadPoolExecutor(browser_pool.size, thread_name_prefix="browser-fetch")
+        self._parsers: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._parsers is None:
+                # spawn: forking a process that runs threads (server, fetchers) is unsafe.
+                self._parsers = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._parsers
+
+    def _reset_pool(self, pool: ProcessPoolExecutor):
+        """Drops a broken pool (a worker crashed): the next parse starts a new one."""
+        with self._lock:
+            if self._parsers is pool:
+                self._parsers = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def fetch(prv) -> tuple[str, str, bytes]:
+        """(provider class name, normalised URL, raw HTML) of a provider; cached pages are not fetched."""
+        return type(prv).__name__, prv.url, prv.load_html().encode("utf-8")
+
+    def parse(self, provider_name: str, url: str, html: bytes) -> Future:
+        pool = self._process_pool()
+        try:
+            future = pool.submit(extract_page, provider_name, url, html)
+        except BrokenProcessPool:
+            self._reset_pool(pool)
+            pool = self._process_pool()
+            future = pool.submit(extract_page, provider_name, url, html)
+
+        def check_pool(done: Future):
+            if isinstance(done.exception(), BrokenProcessPool):
+                print(f"[Parse Pool] A worker crashed while parsing {url}: the next parse starts a new pool")
+                self._reset_pool(pool)
+
+        future.add_done_callback(check_pool)
+        return future
+
+    def submit(self, link: str, fetch_mode: str = "selenium") -> Future:
+        """
+        Fetches `link` on a fetch thread, then parses it in a worker process.
+        The future resolves to the extracted record, or `{"error": ...}`.
+        """
+        result: Future = Future()
+
+        def parsed(future: Future):
+            try:
+                record = future.result()
+            except Exception as e:
+                result.set_result({"link": link, "error": f"parse failed: {e}"})
+                return
+            provider_stats.replay(record.pop("stats"))
+            result.set_result({"link": link, **record})
+
+        def fetched(future: Future):
+            try:
+                provider_name, url, html = future.result()
+                self.parse(provider_name, url, html).add_done_callback(parsed)
+            except Exception as e:
+                result.set_result({"link": link, "error": str(e)})
+
+        try:
+            prv = get_provider(link)(link, fetch_mode=fetch_mode)
+            fetchers = self._browser_fetchers if prv.needs_browser() else self._fetchers
+        except Exception as e:
+            result.set_result({"link": link, "error": str(e)})
+            return result
+        fetchers.submit(self.fetch, prv).add_done_callback(fetched)
+        return result
+
+    def extract(self, link: str, fetch_mode: str = "selenium") -> dict:
+        return self.submit(link, fetch_mode).result()
+
+    def extract_many(self, links: list[str], fetch_mode: str = "selenium") -> list[dict]:
+        """Records of `links`, in order; fetches and parses overlap."""
+        futures = [self.submit(link, fetch_mode) for link in links]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self._fetchers.shutdown(wait=True)
+        self._browser_fetchers.shutdown(wait=True)
+        with self._lock:
+            if self._parsers is not None:
+                self._parsers.shutdown(wait=True)
+                self._parsers = None
+
+
+parse_pool = ParsePool()
+atexit.register(parse_pool.close)
@@ -0,0 +1,297 @@
+"""
+Full text of the downloaded papers, as page-level chunks.
+
+PDFs downloaded by `Provider.download_pdf` (`.data/pdfs`) are turned into
+text in worker processes (text extraction is CPU-bound) and stored as
+chunks under `.data/index/chunks`, one JSONL file per PDF keyed by the
+SHA-256 of its content:
+
+    {"chunk_id": "<sha>:<page>:<part>", "page": 3, "text": "..."}
+
+Pages are extracted and written one at a time, so a large PDF never sits in
+memory as a whole; a page longer than CHUNK_CHARS is split (at whitespace,
+with CHUNK_OVERLAP characters of overlap).
+
+`ChunkStore.sync()` is incremental: files whose size and mtime did not
+change are skipped without being read, and a changed or renamed file whose
+content hash is already stored is not extracted again. The old chunks of a
+changed file, and those of files no longer on disk, are deleted. The chunks
+feed the federated search `local_fulltext` source and `ChunkEmbeddingIndex`.
+Requires `pypdf` (in the worker processes only).
+
+Usage (from the `mcp` directory):
+    python -m surveyor.pdf_chunks
+"""
+import os
+import re
+import sys
+import json
+import glob
+import hashlib
+import importlib.util
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional
+
+from surveyor.providers.provider import DOWNLOAD_DIR, Provider
+
+CHUNK_DIR = ".data/index/chunks"
+CHUNK_CHARS = 2000
+CHUNK_OVERLAP = 200
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 2)))
+HASH_BLOCK = 1 << 20
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def split_page(text: str, size: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    """Parts of at most `size` characters, cut at whitespace when possible."""
+    text = WHITESPACE_RE.sub(" ", text).strip()
+    parts = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = text.rfind(" ", start + size // 2, end)
+            end = cut if cut != -1 else end
+        parts.append(text[start:end].strip())
+        if end == len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [part for part in parts if part]
+
+
+def extract_pdf_chunks(path: str, sha: str, out_path: str) -> dict:
+    """Runs in a worker process: writes the chunks of the PDF at `path` to `out_path`."""
+    from pypdf import PdfReader
+
+    try:
+        reader = PdfReader(path)
+        len(reader.pages)
+    except OSError:
+        raise
+    except Exception as e:
+        # Not a readable PDF: reported, so it is not retried until the file changes.
+        return {"pages": 0, "chunks": 0, "error": f"{type(e).__name__}: {e}"}
+    tmp = out_path + ".tmp"
+    chunks = 0
+    with open(tmp, "w", encoding="utf-8") as file:
+        for page_number, page in enumerate(reader.pages, start=1):
+            try:
+                text = page.extract_text() or ""
+            except Exception as e:
+                print(f"[PDF] {path} page {page_number}: {e}")
+                continue
+            for part_number, part in enumerate(split_page(text)):
+                chunk = {"chunk_id": f"{sha}:{page_number}:{part_number}", "page": page_number, "text": part}
+                file.write(json.dumps(chunk) + "\n")
+                chunks += 1
+    os.replace(tmp, out_path)
+    return {"pages": len(reader.pages), "chunks": chunks}
+
+
+class ChunkStore:
+    """The chunk files and a manifest of the PDFs they were extracted from."""
+
+    def __init__(self, directory: str = CHUNK_DIR, pdf_dir: str = DOWNLOAD_DIR, workers: int = PDF_WORKERS):
+        self.directory = directory
+        self.pdf_dir = pdf_dir
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.manifest: dict[str, dict] = {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                self.manifest = json.load(file)
+        except (OSError, ValueError):
+            pass
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    def chunk_path(self, sha: str) -> str:
+        return os.path.join(self.directory, f"{sha}.jsonl")
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: the server process runs threads, which forking does not mix with.
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _reset_pool(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(self.manifest, file, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def _record(self, path: str, stat: os.stat_result, sha: str, counts: dict):
+        with self._lock:
+            self.manifest[os.path.basename(path)] = {
+                "size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha, **counts,
+            }
+            # Saved after every PDF: an interrupted sync keeps what it extracted.
+            self._save()
+
+    def _forget(self, names: list[str]):
+        """Drops `names` from the manifest, and the chunk files no other PDF shares."""
+        with self._lock:
+            shas = {self.manifest.pop(name)["sha256"] for name in names if name in self.manifest}
+            shas -= {entry["sha256"] for entry in self.manifest.values()}
+            for sha in shas:
+                try:
+                    os.remove(self.chunk_path(sha))
+                except OSError:
+                    pass
+            if names:
+                self._save()
+
+    def _stale(self, paths: list[str]) -> list[tuple[str, os.stat_result]]:
+        stale = []
+        for path in paths:
+            stat = os.stat(path)
+            entry = self.manifest.get(os.path.basename(path))
+            if not entry or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                stale.append((path, stat))
+        return stale
+
+    def sync(self, paths: Optional[list[str]] = None) -> dict:
+        """
+        Extracts the PDFs (default: all of `pdf_dir`) not extracted yet or
+        changed since; returns how many were extracted, reused, failed
+        (unreadable) and deferred (to be retried by a later sync).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        full_scan = paths is None
+        if full_scan:
+            paths = sorted(glob.glob(os.path.join(self.pdf_dir, "*.pdf")))
+        # failed: not a readable PDF (recorded); deferred: left for a later sync.
+        counts = {"extracted": 0, "reused": 0, "failed": 0, "deferred": 0}
+        pending = {}
+        for path, stat in self._stale(paths):
+            sha = file_sha256(path)
+            entry = self.manifest.get(os.path.basename(path))
+            if entry and entry["sha256"] != sha:
+                # The content changed: its old chunks must not be served meanwhile.
+                self._forget([os.path.basename(path)])
+            if os.path.exists(self.chunk_path(sha)):
+                # Same content as an extracted file (touched, renamed or copied).
+                with self._lock:
+                    previous = next((e for e in self.manifest.values() if e["sha256"] == sha), {})
+                self._record(path, stat, sha, {"pages": previous.get("pages"), "chunks": previous.get("chunks")})
+                counts["reused"] += 1
+            else:
+                pending[path] = (stat, sha)
+
+        if pending and importlib.util.find_spec("pypdf") is None:
+            print(f"[PDF] pypdf is not installed: {len(pending)} PDFs left unextracted")
+            counts["deferred"] += len(pending)
+            pending = {}
+
+        if pending:
+            pool = self._process_pool()
+            futures = {
+                pool.submit(extract_pdf_chunks, path, sha, self.chunk_path(sha)): path
+                for path, (stat, sha) in pending.items()
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                stat, sha = pending[path]
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    # A worker crashed: every queued PDF fails with it. None is
+                    # recorded, and the next sync starts a new pool.
+                    print(f"[PDF] Extraction interrupted for {path}: {e}")
+                    self._reset_pool(pool)
+                    counts["deferred"] += 1
+                    continue
+                except Exception as e:
+                    print(f"[PDF] Extraction failed for {path}: {e}")
+                    counts["deferred"] += 1
+                    continue
+                self._record(path, stat, sha, result)
+                if "error" in result:
+                    print(f"[PDF] Cannot extract {path}: {result['error']}")
+                    counts["failed"] += 1
+                else:
+                    counts["extracted"] += 1
+
+        if full_scan:
+            present = {os.path.basename(path) for path in paths}
+            with self._lock:
+                removed = [name for name in self.manifest if name not in present]
+            self._forget(removed)
+        if any(counts.values()):
+            print(f"[PDF] {counts}")
+        return counts
+
+    def signature(self) -> Optional[float]:
+        """Changes whenever `sync` records a file."""
+        return os.path.getmtime(self.manifest_path) if os.path.exists(self.manifest_path) else None
+
+    def iter_chunks(self) -> Iterator[dict]:
+        """Chunks of every PDF in the manifest, with the name of their PDF file."""
+        seen = set()
+        for name, entry in sorted(self.manifest.items()):
+            if entry["sha256"] in seen:
+                continue
+            seen.add(entry["sha256"])
+            try:
+                file = open(self.chunk_path(entry["sha256"]), "r", encoding="utf-8")
+            except OSError:
+                continue
+            with file:
+                for line in file:
+                    yield {**json.loads(line), "pdf": name}
+
+
+def papers_by_pdf_name() -> dict[str, dict]:
+    """PDF file stem (see `Provider.generate_filename`) -> cached paper record."""
+    from surveyor.survey_export import dedupe, iter_cached_papers
+
+    return {
+        Provider.generate_filename(paper["title"]): paper
+        for paper in dedupe(iter_cached_papers()) if paper.get("title")
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Extract the downloaded PDFs into the chunk store.")
+    parser.add_argument("paths", nargs="*", help="PDFs to extract (default: every downloaded PDF).")
+    args = parser.parse_args(argv)
+    store = ChunkStore()
+    try:
+        counts = store.sync(args.paths or None)
+    finally:
+        store.close()
+    print(json.dumps(counts))
+    return 1 if counts["failed"] or counts["deferred"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@ from surveyor.providers.provider import Provider
 
 class IEEEXplore(Provider):
     _provider = "IEEEXplore"
+    requires_browser = True
 
     def __init__(self, url: str, cache: bool = True, fetch_mode: str = "selenium"):
         if url.endswith(".pdf"):
@@ -19,7 +20,7 @@ class IEEEXplore(Provider):
             return "Abstract not found"
 
     def fetch_html(self, url):
-        return self.fetch_using_selenium(url)
+        return self.fetch_using_selenium(url, provider_name=str(self))
 
     def get_title(self) -> str:
         title = self.soup.find("meta", property="og:title")
@@ -4,14 +4,10 @@ import requests
 from bs4 import BeautifulSoup
 import os
 import hashlib
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.webdriver.chrome.options import Options as ChromeOptions
 from surveyor.semantic_scholar.api import get_paper_info
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from selenium.webdriver.chrome.service import Service as ChromeService
+from surveyor.utils.instrumentation import provider_stats, instrument_extractor, get_domain
+# selenium and webdriver_manager are imported inside the browser helpers:
+# they are slow to import and only needed when a browser is launched.
 
 DATADIR = ".data/"
 SEARCH_DIR = os.path.join(DATADIR, "searches")
@@ -29,19 +25,58 @@ if not os.path.exists(DATADIR):
     os.makedirs(SEMANTIC_DIR)
 
 
+# Extraction methods whose duration and success are recorded per provider.
+INSTRUMENTED_METHODS = {
+    "get_abstract": "extract_abstract",
+    "get_doi": "extract_doi",
+    "get_title": "extract_title",
+}
+
+
 class Provider:
     _provider = ""
+    # Set by providers whose `fetch_html` always uses a browser, whatever `fetch_mode`.
+    requires_browser = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, stage in INSTRUMENTED_METHODS.items():
+            if name in cls.__dict__:
+                setattr(cls, name, instrument_extractor(stage, cls.__dict__[name]))
 
     def __init__(self, url: str, cache: bool = True, fetch_mode: str = "selenium"):
         self.url: str = url
         self.fetch_mode = fetch_mode
-        if cache:
-            self.soup = self.get_html_cache()
-        else:
-            self.soup = self.get_html()
-
-        # else:
-        #     self.soup = self.get_html()
+        self.cache = cache
+        # Fetched and parsed on first use (see `soup`).
+        self._soup: Optional[BeautifulSoup] = None
+
+    @classmethod
+    def from_html(cls, url: str, html: str) -> "Provider":
+        """A provider over already fetched HTML (`url` must be normalised already)."""
+        prv = cls.__new__(cls)
+        Provider.__init__(prv, url, cache=False)
+        prv._soup = prv.get_soup(html)
+        return prv
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            self._soup = self.get_soup(self.load_html())
+        return self._soup
+
+    def load_html(self) -> str:
+        """Raw HTML of the page, from the cache (with `cache`) or fetched."""
+        return self.load_html_cache() if self.cache else self._timed_fetch()
+
+    def needs_browser(self) -> bool:
+        """Whether `load_html` would start (or borrow) a browser."""
+        if self.cache and os.path.exists(self.html_cache_file()):
+            return False
+        return self.requires_browser or self.fetch_mode == "selenium"
+
+    def html_cache_file(self) -> str:
+        return os.path.join(SEARCH_DIR, f"{self.__class__.__name__}_{self.get_url_hash()}.html")
 
     def __str__(self):
         return self.__class__.__name__
@@ -61,11 +96,16 @@ class Provider:
         urlhash = self.get_url_hash()
         semantic_file = os.path.join(SEMANTIC_DIR, f"{urlhash}.json")
         if os.path.exists(semantic_file):
+            provider_stats.record(str(self), get_domain(self.url), "semantic_cache_hit")
             with open(semantic_file, "r", encoding="utf-8") as file:
                 paper_info = json.load(file)
         else:
-            paper_info = get_paper_info(self.get_doi())
+            provider_stats.record(str(self), get_domain(self.url), "semantic_cache_miss")
+            doi = self.get_doi()
+            with provider_stats.measure(str(self), self.url, "semantic_lookup"):
+                paper_info = get_paper_info(doi)
             if "code" in paper_info:
+                provider_stats.record(str(self), get_domain(self.url), "semantic_error", ok=False)
                 print(f"Error in {self.url}: {paper_info}")
             else:
                 with open(semantic_file, "w", encoding="utf-8") as file:
@@ -94,7 +134,7 @@ class Provider:
 
         match self.fetch_mode:
             case "selenium":
-                return self.fetch_using_selenium(url)
+                return self.fetch_using_selenium(url, provider_name=str(self))
 
             case _:
                 return self.fetch_html_using_requests(url)
@@ -113,24 +153,35 @@ class Provider:
         return response.text
 
     @staticmethod
-    def fetch_using_selenium(url: str) -> str:
+    def new_firefox_driver():
+        """Starts a headless Firefox (also used by `surveyor.utils.browser_pool`)."""
+        from selenium import webdriver
+        from selenium.webdriver.firefox.options import Options as FirefoxOptions
+        from selenium.webdriver.firefox.service import Service as FirefoxService
+
         options = FirefoxOptions()
         options.headless = True  # type: ignore
         # driver_path = GeckoDriverManager().install()
         driver_path = "C:\\Users\\Jyoti\\.wdm\\drivers\\geckodriver\\win64\\v0.36.0\\geckodriver.exe"
         print(driver_path)
-        driver = webdriver.Firefox(options=options, service=FirefoxService(driver_path))
+        return webdriver.Firefox(options=options, service=FirefoxService(driver_path))
 
-        try:
-            driver.get(url)
-            html = driver.page_source
-        finally:
-            driver.quit()
+    @staticmethod
+    def fetch_using_selenium(url: str, provider_name: str = "Provider") -> str:
+        # Pooled: parallel fetches (enrichment, parse pool) never run more
+        # than BROWSER_POOL_SIZE browsers, even for providers that always
+        # use selenium (IEEE, ScienceDirect, ...).
+        from surveyor.utils.browser_pool import browser_pool
 
-        return html
+        return browser_pool.fetch(url, provider_name=provider_name)
 
     @staticmethod
     def download_using_chrome(title, url) -> Tuple[bool, str]:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options as ChromeOptions
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        from webdriver_manager.chrome import ChromeDriverManager
+
         user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36"
 
         chrome_options = ChromeOptions()
@@ -155,6 +206,9 @@ class Provider:
 
     @staticmethod
     def download_using_firefox(title, url) -> Tuple[bool, str]:
+        from selenium import webdriver
+        from selenium.webdriver.firefox.options import Options as FirefoxOptions
+
         firefox_options = FirefoxOptions()
         firefox_options.headless = True  # type: ignore
         firefox_options.set_preference("browser.download.folderList", 2)
@@ -207,10 +261,15 @@ class Provider:
 
     def get_soup(self, html: str) -> BeautifulSoup:
         """Parse the HTML content and return a BeautifulSoup object."""
-        return BeautifulSoup(html, "html.parser")
+        with provider_stats.measure(str(self), self.url, "parse"):
+            return BeautifulSoup(html, "html.parser")
+
+    def _timed_fetch(self) -> str:
+        with provider_stats.measure(str(self), self.url, f"fetch_{self.fetch_mode}"):
+            return self.fetch_html(self.url)
 
     def get_html(self) -> BeautifulSoup:
-        html = self.fetch_html(self.url)
+        html = self._timed_fetch()
 
         return self.get_soup(html)
 
@@ -220,28 +279,34 @@ class Provider:
         return hashlib.md5(url.encode()).hexdigest()
 
     def get_html_cache(self) -> BeautifulSoup:
-        # Create a hash of the URL
-        url_hash = self.get_url_hash()
-        cache_file = os.path.join(
-            SEARCH_DIR, f"{self.__class__.__name__}_{url_hash}.html"
-        )
+        return self.get_soup(self.load_html_cache())
+
+    def load_html_cache(self) -> str:
+        cache_file = self.html_cache_file()
 
         # Check if the file exists in the DATADIR
         if os.path.exists(cache_file):
+            provider_stats.record(str(self), get_domain(self.url), "html_cache_hit")
             with open(cache_file, "r", encoding="utf-8") as file:
-                return self.get_soup(file.read())
+                return file.read()
         else:
+            provider_stats.record(str(self), get_domain(self.url), "html_cache_miss")
             # Fetch using get_html and store in the DATADIR if data is returned successfully
-            html_content = self.fetch_html(self.url)
+            html_content = self._timed_fetch()
             if html_content and len(html_content) > 30:
                 with open(cache_file, "w", encoding="utf-8") as file:
                     file.write(html_content)
-                return self.get_soup(html_content)
+                return html_content
             else:
                 print(html_content)
                 raise ValueError("Failed to fetch HTML content")
 
 
+# The base implementations are inherited by most providers: instrument them too.
+for _name, _stage in INSTRUMENTED_METHODS.items():
+    setattr(Provider, _name, instrument_extractor(_stage, Provider.__dict__[_name]))
+
+
 class AbstractClassProvider(Provider):
     def get_abstract_by_class(self, class_=""):
         return self.get_abstract_by_element("div", class_)
@@ -1,12 +1,11 @@
 import requests
 from bs4 import BeautifulSoup
 from surveyor.providers.provider import Provider
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options
 
 
 class ScienceDirectProvider(Provider):
     _provider = "ScienceDirect"
+    requires_browser = True
 
     # def fetch_html(self, url: str) -> str:
     #     headers = {
@@ -44,7 +43,7 @@ class ScienceDirectProvider(Provider):
             raise Exception(f"DOI not found : {self.url}")
 
     def fetch_html(self, url):
-        return self.fetch_using_selenium(url)
+        return self.fetch_using_selenium(url, provider_name=str(self))
 
     def get_abstract(self) -> str:
         abstract = self.soup.find("div", class_="abstract author")
@@ -1,3 +1,6 @@
+import queue
+import threading
+import time
 import requests
 
 from surveyor.utils.urls import get_url_hash
@@ -52,3 +55,150 @@ def search_topic(
         with open(f"{CACHE_DIR}/{hash}.json", "w", encoding="utf-8") as file:
             json.dump(data, file, indent=4)
     return data
+
+
+BULK_SEARCH_URL = "https://api.semanticscholar.org/graph/v1/paper/search/bulk"
+# The bulk endpoint does not serve tldr nor citationStyles.
+BULK_FIELDS = "title,corpusId,abstract,year,referenceCount,citationCount,externalIds,url"
+BULK_DIR = ".data/results/semantic_bulk"
+RATE_LIMIT_RETRIES = 5
+
+
+def _bulk_session() -> requests.Session:
+    session = requests.Session()
+    api_key = os.getenv("SEMANTIC_SCHOLAR_API_KEY")
+    if api_key:
+        session.headers["x-api-key"] = api_key
+    return session
+
+
+def fetch_bulk_page(session, query, fields=BULK_FIELDS, token=None, **filters) -> dict:
+    """One page (up to 1000 papers) of `/paper/search/bulk`; retries on 429."""
+    params = {"query": query, "fields": fields, **filters}
+    if token:
+        params["token"] = token
+    for attempt in range(RATE_LIMIT_RETRIES):
+        response = session.get(BULK_SEARCH_URL, params=params, timeout=60)
+        if response.status_code != 429:
+            break
+        wait = 2 ** attempt
+        print(f"Rate limit exceeded, retrying in {wait}s")
+        time.sleep(wait)
+    response.raise_for_status()
+    return response.json()
+
+
+def iter_bulk_pages(query, fields=BULK_FIELDS, token=None, prefetch=1, **filters):
+    """
+    Yields `(papers, next_token)` per page of a bulk search, following the
+    continuation tokens. A background thread fetches up to `prefetch` pages
+    ahead, so the network overlaps with the caller's processing. Closing
+    the generator early stops the fetching.
+    """
+    pages: queue.Queue = queue.Queue(maxsize=max(1, prefetch))
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        session = _bulk_session()
+        next_token = token
+        try:
+            while not stop.is_set():
+                data = fetch_bulk_page(session, query, fields, next_token, **filters)
+                next_token = data.get("token")
+                if not put((data.get("data") or [], next_token)) or not next_token:
+                    break
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+            session.close()
+
+    thread = threading.Thread(target=producer, daemon=True, name="s2-bulk-prefetch")
+    thread.start()
+    try:
+        while True:
+            item = pages.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def iter_bulk_search(query, fields=BULK_FIELDS, max_results=None, prefetch=1, **filters):
+    """
+    Yields the papers of a bulk search one by one, up to `max_results`.
+    `filters` are passed to the endpoint (e.g. `year="2020-"`, `sort="citationCount:desc"`).
+    """
+    count = 0
+    pages = iter_bulk_pages(query, fields, prefetch=prefetch, **filters)
+    try:
+        for papers, _ in pages:
+            for paper in papers:
+                if max_results is not None and count >= max_results:
+                    return
+                count += 1
+                yield paper
+    finally:
+        pages.close()
+
+
+def stream_bulk_search(query, path=None, fields=BULK_FIELDS, max_results=None,
+                       prefetch=1, resume=True, **filters) -> dict:
+    """
+    Writes the papers of a bulk search to a JSONL file as pages arrive. The
+    continuation token is checkpointed after each page, so an interrupted
+    run resumes from the last complete page.
+    """
+    if path is None:
+        os.makedirs(BULK_DIR, exist_ok=True)
+        path = os.path.join(BULK_DIR, f"{get_url_hash(query + fields + json.dumps(filters, sort_keys=True))}.jsonl")
+    state_path = path + ".state"
+
+    # `token` fetches the next page to write, of which `skip` papers are already written.
+    state = {"token": None, "skip": 0, "written": 0, "offset": 0, "complete": False}
+    if resume and os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as file:
+            state = json.load(file)
+    if state["complete"] or (max_results is not None and state["written"] >= max_results):
+        return {"path": path, **state}
+
+    with open(path, "ab") as file:
+        # Drop records written after the last checkpoint: that page is fetched again.
+        file.truncate(state["offset"])
+        pages = iter_bulk_pages(query, fields, token=state["token"], prefetch=prefetch, **filters)
+        try:
+            for papers, next_token in pages:
+                remaining = papers[state["skip"]:]
+                if max_results is not None:
+                    remaining = remaining[:max_results - state["written"]]
+                file.write("".join(json.dumps(paper) + "\n" for paper in remaining).encode("utf-8"))
+                file.flush()
+                state["written"] += len(remaining)
+                state["offset"] = file.tell()
+                if state["skip"] + len(remaining) < len(papers):
+                    # Stopped inside this page (max_results): resume within it.
+                    state["skip"] += len(remaining)
+                else:
+                    state["token"], state["skip"] = next_token, 0
+                    state["complete"] = next_token is None
+                with open(state_path, "w", encoding="utf-8") as state_file:
+                    json.dump(state, state_file)
+                if max_results is not None and state["written"] >= max_results:
+                    break
+        finally:
+            pages.close()
+    print(f"Bulk search '{query}': {state['written']} papers in {path}")
+    return {"path": path, **state}
@@ -0,0 +1,212 @@
+"""
+Columnar export of a survey corpus.
+
+Paper metadata is scattered over the caches: Semantic Scholar search pages
+and bulk searches, per-paper `get_info` results and Google CSE result
+pages, all pretty-printed JSON. `export_survey` consolidates them, one row
+per paper (deduplicated on DOI, corpusId or URL), into a Parquet file
+(compressed, for storage and exchange) or an Arrow IPC file (uncompressed,
+memory-mappable). `provider` and `source` are dictionary-encoded.
+
+`open_survey` memory-maps an export, so ranking and dedup can run
+vectorised over tens of thousands of papers without parsing JSON.
+Requires `pyarrow` (also loaded by the server, through the `rank_papers` tool).
+
+Usage (from the `mcp` directory):
+    python -m surveyor.survey_export .data/survey.arrow
+"""
+import os
+import sys
+import json
+import glob
+import argparse
+from typing import Iterable, Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from surveyor.providers.provider import SEARCH_DIR, RESULTS_DIR, SEMANTIC_DIR
+from surveyor.semantic_scholar.api import CACHE_DIR as SEMANTIC_SEARCH_DIR, BULK_DIR
+from surveyor.utils.papers import normalise_doi, paper_keys
+
+GCSE_RESULTS_DIR = os.path.join(RESULTS_DIR, "gcse")
+
+SURVEY_SCHEMA = pa.schema([
+    ("paper_key", pa.string()),
+    ("title", pa.string()),
+    ("doi", pa.string()),
+    ("corpus_id", pa.int64()),
+    ("year", pa.int16()),
+    ("citation_count", pa.int32()),
+    ("reference_count", pa.int32()),
+    ("abstract", pa.string()),
+    ("provider", pa.dictionary(pa.int16(), pa.string())),
+    ("source", pa.dictionary(pa.int8(), pa.string())),
+    ("url", pa.string()),
+])
+COLUMNS = SURVEY_SCHEMA.names
+
+
+def paper_from_semantic(record: dict, source: str, provider: Optional[str] = None) -> dict:
+    external_ids = record.get("externalIds") or {}
+    doi = normalise_doi(external_ids.get("DOI"))
+    return {
+        "title": record.get("title"),
+        "doi": doi,
+        "corpus_id": record.get("corpusId"),
+        "year": record.get("year"),
+        "citation_count": record.get("citationCount"),
+        "reference_count": record.get("referenceCount"),
+        "abstract": record.get("abstract") or (record.get("tldr") or {}).get("text"),
+        "provider": provider,
+        "source": source,
+        "url": record.get("url") or (f"https://doi.org/{doi}" if doi else None),
+    }
+
+
+def _load_json(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _providers_by_hash() -> dict[str, str]:
+    """URL hash -> provider class, from the HTML cache (`<Provider>_<hash>.html`)."""
+    providers = {}
+    for path in glob.glob(os.path.join(SEARCH_DIR, "*_*.html")):
+        provider, _, url_hash = os.path.basename(path)[:-5].rpartition("_")
+        providers[url_hash] = provider
+    return providers
+
+
+def iter_cached_papers() -> Iterator[dict]:
+    """Every paper record found in the caches, in no particular order."""
+    providers = _providers_by_hash()
+    for path in glob.glob(os.path.join(SEMANTIC_DIR, "*.json")):
+        data = _load_json(path)
+        if isinstance(data, dict) and "title" in data:
+            url_hash = os.path.basename(path)[:-5]
+            yield paper_from_semantic(data, "get_info", providers.get(url_hash))
+
+    for path in glob.glob(os.path.join(SEMANTIC_SEARCH_DIR, "*.json")):
+        data = _load_json(path)
+        for record in (data or {}).get("data") or []:
+            yield paper_from_semantic(record, "semantic_search")
+
+    for path in glob.glob(os.path.join(BULK_DIR, "*.jsonl")):
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield paper_from_semantic(json.loads(line), "semantic_bulk")
+                except ValueError:
+                    continue
+
+    from surveyor.providers import get_provider
+    for path in glob.glob(os.path.join(GCSE_RESULTS_DIR, "*.json")):
+        data = _load_json(path)
+        for r in (data or {}).get("results") or []:
+            link = r.get("link")
+            details = r.get("details") or {}
+            yield {
+                "title": details.get("title") or r.get("title"),
+                "doi": normalise_doi(details.get("doi")) or normalise_doi(link),
+                "abstract": details.get("abstract"),
+                "provider": get_provider(link).__name__ if link else None,
+                "source": "google_cse",
+                "url": r.get("canonical_url") or link,
+            }
+
+
+def dedupe(papers: Iterable[dict]) -> list[dict]:
+    """
+    One row per paper: records sharing a DOI, corpusId or URL are merged,
+    the first non-empty value of each column winning. A record that links
+    two rows (e.g. the DOI of one and the URL of the other) merges them.
+    """
+    by_key: dict[str, dict] = {}
+    rows: list[dict] = []
+    dropped: set[int] = set()
+    for paper in papers:
+        keys = paper_keys(paper)
+        if not keys:
+            continue
+        matches = []
+        for key in keys:
+            if key in by_key and not any(by_key[key] is match for match in matches):
+                matches.append(by_key[key])
+        if not matches:
+            row = dict.fromkeys(COLUMNS)
+            rows.append(row)
+        else:
+            row = matches[0]
+        for other in [*matches[1:], paper]:
+            for column, value in other.items():
+                if row.get(column) in (None, "") and value not in (None, ""):
+                    row[column] = value
+        for other in matches[1:]:
+            for key in paper_keys(other):
+                by_key[key] = row
+            dropped.add(id(other))
+        for key in paper_keys(row):
+            by_key[key] = row
+    rows = [row for row in rows if id(row) not in dropped]
+    for row in rows:
+        row["paper_key"] = paper_keys(row)[0]
+    return rows
+
+
+def to_table(papers: Iterable[dict]) -> pa.Table:
+    rows = [{column: paper.get(column) for column in COLUMNS} for paper in papers]
+    columns = {}
+    for field in SURVEY_SCHEMA:
+        values = [row[field.name] for row in rows]
+        if pa.types.is_dictionary(field.type):
+            columns[field.name] = pa.array(values, type=pa.string()).dictionary_encode().cast(field.type)
+        else:
+            columns[field.name] = pa.array(values, type=field.type)
+    return pa.Table.from_pydict(columns, schema=SURVEY_SCHEMA)
+
+
+def export_survey(path: str, papers: Optional[Iterable[dict]] = None) -> str:
+    """
+    Writes `papers` (default: everything in the caches, deduplicated) to
+    `path`: Parquet for a `.parquet` suffix, otherwise an Arrow IPC file.
+    """
+    if papers is None:
+        papers = dedupe(iter_cached_papers())
+    table = to_table(papers)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".parquet"):
+        pq.write_table(table, path, compression="zstd", use_dictionary=True)
+    else:
+        # Uncompressed, so `open_survey` can map the buffers without copying.
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    print(f"Exported {table.num_rows} papers to {path}")
+    return path
+
+
+def open_survey(path: str, columns: Optional[list[str]] = None) -> pa.Table:
+    """
+    Opens an export memory-mapped. Arrow IPC files are zero-copy: only the
+    pages of the columns actually read are loaded.
+    """
+    if path.endswith(".parquet"):
+        return pq.read_table(path, columns=columns, memory_map=True)
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return table.select(columns) if columns else table
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export the cached survey papers to Parquet/Arrow.")
+    parser.add_argument("path", nargs="?", default=os.path.join(RESULTS_DIR, "survey.arrow"),
+                        help="Output file (.parquet or .arrow).")
+    args = parser.parse_args(argv)
+    export_survey(args.path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""
+Incremental, resumable survey jobs.
+
+A survey runs as a pipeline of stages over the papers found by a search:
+
+    search (once per job) -> resolve -> enrich -> download -> extract
+
+- search:   Google CSE results pages 1..N (`web_search_multi_page`).
+- resolve:  the publisher page through its `Provider`: title, DOI, abstract
+            (parsed in the `parse_pool` processes).
+- enrich:   Semantic Scholar metadata for the DOI (also written to the
+            `get_info` cache, so the indexes and exports pick it up).
+- download: the open-access PDF, when Semantic Scholar knows one.
+- extract:  the text of the PDF, into the chunk store (see `pdf_chunks`).
+
+The state of every item (stage, status, attempts, data) is persisted in a
+SQLite database after each step, so a crashed or interrupted run resumes
+exactly where it stopped: finished steps are never redone, and steps that
+were running are retried. Each stage has its own thread pool (bounded
+concurrency); a failing step is retried with exponential backoff up to
+`max_attempts`, except for `PermanentError`s.
+
+Usage (from the `mcp` directory):
+    python -m surveyor.survey_job "cross-organizational identity management" --pages 5
+    python -m surveyor.survey_job "cross-organizational identity management" --pages 5 --retry-failed
+    python -m surveyor.survey_job --status <job id>
+"""
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Optional
+
+from surveyor.providers.provider import DATADIR, SEMANTIC_DIR, Provider
+from surveyor.utils.urls import get_url_hash
+
+JOBS_DB = os.path.join(DATADIR, "jobs.sqlite")
+POLL_INTERVAL = 0.5
+
+
+class PermanentError(Exception):
+    """A failure that retrying cannot fix (e.g. a paper unknown to the API)."""
+
+
+class Stage:
+    """
+    Args:
+        name: Stage name, stored with each item.
+        func: Called with the item data; returns a dict merged into it.
+        concurrency: Items of this stage processed at once.
+        max_attempts: Tries before the item is marked failed.
+        backoff: Delay before the first retry (doubled each attempt, jittered).
+    """
+
+    def __init__(self, name: str, func: Callable[[dict], Optional[dict]], concurrency: int = 2,
+                 max_attempts: int = 4, backoff: float = 5.0):
+        self.name = name
+        self.func = func
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+    def retry_delay(self, attempts: int) -> float:
+        return self.backoff * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+
+
+class JobStore:
+    """Per-item pipeline state in SQLite (shared by the runner's threads)."""
+
+    def __init__(self, path: str = JOBS_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY, params TEXT, created REAL, seeded INTEGER DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS items (
+                    job_id TEXT, item_key TEXT, stage TEXT, status TEXT,
+                    attempts INTEGER DEFAULT 0, next_attempt REAL DEFAULT 0,
+                    data TEXT, error TEXT, updated REAL,
+                    PRIMARY KEY (job_id, item_key)
+                );
+            """)
+
+    def create_job(self, job_id: str, params: dict):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO jobs (job_id, params, created) VALUES (?, ?, ?)",
+                (job_id, json.dumps(params), time.time()),
+            )
+
+    def is_seeded(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT seeded FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def add_items(self, job_id: str, stage: str, items: dict[str, dict]):
+        """Adds items (key -> data) at `stage`; existing keys are left untouched."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO items (job_id, item_key, stage, status, data, updated) "
+                "VALUES (?, ?, ?, 'pending', ?, ?)",
+                [(job_id, key, stage, json.dumps(data), time.time()) for key, data in items.items()],
+            )
+            self._db.execute("UPDATE jobs SET seeded = 1 WHERE job_id = ?", (job_id,))
+
+    def reset_running(self, job_id: str) -> int:
+        """Items left running by a crashed run go back to pending."""
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE items SET status = 'pending' WHERE job_id = ? AND status = 'running'", (job_id,)
+            ).rowcount
+
+    def reset_failed(self, job_id: str) -> int:
+        """Failed items get a new round of attempts at the stage they failed."""
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE items SET status = 'pending', attempts = 0, next_attempt = 0 "
+                "WHERE job_id = ? AND status = 'failed'", (job_id,)
+            ).rowcount
+
+    def claim(self, job_id: str, stage: str, limit: int) -> list[tuple[str, dict, int]]:
+        """Marks up to `limit` ready items of `stage` running; returns (key, data, attempts)."""
+        if limit <= 0:
+            return []
+        with self._lock, self._db:
+            rows = self._db.execute(
+                "SELECT item_key, data, attempts FROM items WHERE job_id = ? AND stage = ? "
+                "AND status = 'pending' AND next_attempt <= ? LIMIT ?",
+                (job_id, stage, time.time(), limit),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE items SET status = 'running', updated = ? WHERE job_id = ? AND item_key = ?",
+                [(time.time(), job_id, key) for key, _, _ in rows],
+            )
+        return [(key, json.loads(data), attempts) for key, data, attempts in rows]
+
+    def advance(self, job_id: str, key: str, data: dict, next_stage: Optional[str]):
+        """Stores the step result and moves the item to `next_stage` (None = done)."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE items SET stage = COALESCE(?, stage), status = ?, attempts = 0, next_attempt = 0, "
+                "data = ?, error = NULL, updated = ? WHERE job_id = ? AND item_key = ?",
+                (next_stage, "pending" if next_stage else "done", json.dumps(data), time.time(), job_id, key),
+            )
+
+    def retry(self, job_id: str, key: str, attempts: int, delay: Optional[float], error: str):
+        """Schedules a retry after `delay` seconds, or fails the item (delay None)."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE items SET status = ?, attempts = ?, next_attempt = ?, error = ?, updated = ? "
+                "WHERE job_id = ? AND item_key = ?",
+                ("pending" if delay is not None else "failed", attempts,
+                 time.time() + (delay or 0), error, time.time(), job_id, key),
+            )
+
+    def has_pending(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM items WHERE job_id = ? AND status IN ('pending', 'running') LIMIT 1", (job_id,)
+            ).fetchone()
+        return row is not None
+
+    def status(self, job_id: str) -> dict:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT stage, status, COUNT(*) FROM items WHERE job_id = ? GROUP BY stage, status", (job_id,)
+            ).fetchall()
+            failures = self._db.execute(
+                "SELECT item_key, stage, error FROM items WHERE job_id = ? AND status = 'failed'", (job_id,)
+            ).fetchall()
+        counts: dict[str, dict] = {}
+        for stage, status, count in rows:
+            counts.setdefault(stage, {})[status] = count
+        return {
+            "job_id": job_id,
+            "stages": counts,
+            "failed": [{"item": key, "stage": stage, "error": error} for key, stage, error in failures],
+        }
+
+
+class JobRunner:
+    """Runs the items of a job through `stages` until none is pending."""
+
+    def __init__(self, store: JobStore, stages: list[Stage]):
+        self.store = store
+        self.stages = stages
+        self._next = {stage.name: (stages[i + 1].name if i + 1 < len(stages) else None)
+                      for i, stage in enumerate(stages)}
+
+    def _run_step(self, stage: Stage, data: dict) -> dict:
+        return {**data, **(stage.func(data) or {})}
+
+    def run(self, job_id: str) -> dict:
+        reset = self.store.reset_running(job_id)
+        if reset:
+            print(f"[Survey Job] Resuming {job_id}: {reset} interrupted steps will be retried.")
+        pools = {stage.name: ThreadPoolExecutor(stage.concurrency, thread_name_prefix=f"job-{stage.name}")
+                 for stage in self.stages}
+        running = {stage.name: {} for stage in self.stages}
+        try:
+            while True:
+                for stage in self.stages:
+                    free = stage.concurrency - len(running[stage.name])
+                    for key, data, attempts in self.store.claim(job_id, stage.name, free):
+                        future = pools[stage.name].submit(self._run_step, stage, data)
+                        running[stage.name][future] = (key, data, attempts)
+
+                futures = {future: stage for stage in self.stages for future in running[stage.name]}
+                if not futures:
+                    if not self.store.has_pending(job_id):
+                        break
+                    # Only items waiting for their retry time: sleep until one is due.
+                    time.sleep(POLL_INTERVAL)
+                    continue
+
+                done, _ = wait(futures, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = futures[future]
+                    key, data, attempts = running[stage.name].pop(future)
+                    self._finish(job_id, stage, key, attempts, future)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+        status = self.store.status(job_id)
+        print(f"[Survey Job] {job_id}: {status['stages']}")
+        return status
+
+    def _finish(self, job_id: str, stage: Stage, key: str, attempts: int, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            attempts += 1
+            error = f"{type(e).__name__}: {e}"
+            if isinstance(e, PermanentError) or attempts >= stage.max_attempts:
+                print(f"[Survey Job] {stage.name} failed for {key}: {error}")
+                self.store.retry(job_id, key, attempts, None, error)
+            else:
+                delay = stage.retry_delay(attempts)
+                print(f"[Survey Job] {stage.name} attempt {attempts} failed for {key}, retrying in {delay:.0f}s: {error}")
+                self.store.retry(job_id, key, attempts, delay, error)
+            return
+        self.store.advance(job_id, key, result, self._next[stage.name])
+
+
+# --- The survey stages ---
+
+ENRICH_FIELDS = "title,corpusId,abstract,tldr,year,referenceCount,citationCount,citationStyles,externalIds,openAccessPdf"
+
+
+def resolve_paper(data: dict) -> dict:
+    from surveyor.parse_pool import parse_pool
+
+    record = parse_pool.extract(data["link"])
+    if "error" in record:
+        raise RuntimeError(record["error"])
+    return {field: record[field] for field in ("provider", "url", "title", "abstract", "doi")}
+
+
+def enrich_paper(data: dict) -> dict:
+    from surveyor.semantic_scholar.api import get_paper_info
+
+    if not data.get("doi"):
+        return {"semantic": None}
+    # Same cache file as `Provider.get_info`.
+    semantic_file = os.path.join(SEMANTIC_DIR, f"{get_url_hash(data['url'])}.json")
+    if os.path.exists(semantic_file):
+        with open(semantic_file, "r", encoding="utf-8") as file:
+            return {"semantic": json.load(file)}
+    info = get_paper_info(data["doi"], fields=ENRICH_FIELDS)
+    if info.get("code") == "429" or "message" in info:
+        raise RuntimeError(f"Semantic Scholar: {info}")
+    if "error" in info:
+        raise PermanentError(info["error"])
+    with open(semantic_file, "w", encoding="utf-8") as file:
+        json.dump(info, file, indent=2)
+    return {"semantic": info}
+
+
+def download_paper(data: dict) -> dict:
+    pdf_url = ((data.get("semantic") or {}).get("openAccessPdf") or {}).get("url")
+    if not pdf_url:
+        return {"pdf": None}
+    ok, path = Provider.download_pdf(data.get("title") or get_url_hash(pdf_url), pdf_url)
+    if not ok:
+        raise RuntimeError(f"Download of {pdf_url} failed")
+    return {"pdf": path}
+
+
+_chunk_store = None
+
+
+def extract_text(data: dict) -> dict:
+    global _chunk_store
+    from surveyor.pdf_chunks import ChunkStore
+
+    if not data.get("pdf"):
+        return {"chunks": 0}
+    if _chunk_store is None:
+        _chunk_store = ChunkStore()
+    counts = _chunk_store.sync([data["pdf"]])
+    if counts["failed"]:
+        raise PermanentError(f"Cannot extract text from {data['pdf']}")
+    if counts["deferred"]:
+        raise RuntimeError(f"Extraction of {data['pdf']} did not complete")
+    return {"chunks": _chunk_store.manifest[os.path.basename(data["pdf"])]["chunks"]}
+
+
+SURVEY_STAGES = [
+    Stage("resolve", resolve_paper, concurrency=3),
+    Stage("enrich", enrich_paper, concurrency=2, max_attempts=6, backoff=10.0),
+    Stage("download", download_paper, concurrency=4),
+    Stage("extract", extract_text, concurrency=2),
+]
+
+
+def run_survey(query: str, pages: int = 5, job_id: Optional[str] = None, store: Optional[JobStore] = None,
+               retry_failed: bool = False) -> dict:
+    """Runs (or resumes) the survey job of `query`."""
+    store = store or JobStore()
+    job_id = job_id or get_url_hash(f"{query}|{pages}")
+    store.create_job(job_id, {"query": query, "pages": pages})
+    if retry_failed:
+        store.reset_failed(job_id)
+    if not store.is_seeded(job_id):
+        from mcp_clients.google_scholar import web_search_multi_page
+
+        def search(_):
+            found = web_search_multi_page(query, pages=pages, sort="relevance")
+            if not found["results"] and found["failed_pages"]:
+                raise RuntimeError(f"every result page failed: {found['failed_pages']}")
+            return found
+
+        search = Stage("search", search)
+        for attempt in range(1, search.max_attempts + 1):
+            try:
+                results = search.func({})["results"]
+                break
+            except Exception as e:
+                if attempt == search.max_attempts:
+                    raise
+                delay = search.retry_delay(attempt)
+                print(f"[Survey Job] Search attempt {attempt} failed, retrying in {delay:.0f}s: {e}")
+                time.sleep(delay)
+        store.add_items(job_id, SURVEY_STAGES[0].name, {
+            r["canonical_url"]: {"link": r["link"], "title": r["title"]} for r in results
+        })
+        print(f"[Survey Job] {job_id}: {len(results)} papers found for '{query}'")
+    return JobRunner(store, SURVEY_STAGES).run(job_id)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run or resume a survey job.")
+    parser.add_argument("query", nargs="?", help="Search query of the survey.")
+    parser.add_argument("--pages", type=int, default=5, help="CSE result pages to collect.")
+    parser.add_argument("--job", help="Job id (default: derived from the query and pages).")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry the items that failed before.")
+    parser.add_argument("--status", metavar="JOB", help="Print the state of a job and exit.")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        print(json.dumps(JobStore().status(args.status), indent=2))
+        return 0
+    if not args.query:
+        parser.error("a query is required")
+    status = run_survey(args.query, args.pages, args.job, retry_failed=args.retry_failed)
+    return 1 if status["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
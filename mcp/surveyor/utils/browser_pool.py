@@ -0,0 +1,104 @@
+"""
+A pool of reusable headless browsers.
+
+Starting a browser per page costs seconds per fetch. Every selenium fetch
+(`Provider.fetch_using_selenium`, the CSE search) goes through
+`browser_pool` instead and borrows one of at most `size` long-lived
+browsers, so parallel fetches reuse warm browsers and the number running
+at once stays bounded.
+"""
+import os
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+from surveyor.utils.instrumentation import provider_stats
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "3"))
+
+
+class BrowserPool:
+    """
+    Args:
+        size: Most browsers alive at once; borrowers wait when all are busy.
+        factory: Starts a browser (defaults to `Provider.new_firefox_driver`).
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, factory: Callable = None):
+        self.size = size
+        self._factory = factory
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._drivers = []
+
+    def _new_driver(self, url: str, provider_name: str):
+        factory = self._factory
+        if factory is None:
+            from surveyor.providers.provider import Provider
+            factory = Provider.new_firefox_driver
+        with provider_stats.measure(provider_name, url, "browser_start"):
+            driver = factory()
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"[Browser Pool] Failed to quit a browser: {e}")
+
+    @contextmanager
+    def browser(self, url: str = "", provider_name: str = "BrowserPool"):
+        """Borrows a browser; one that raised is discarded instead of reused."""
+        self._slots.acquire()
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._new_driver(url, provider_name)
+            try:
+                yield driver
+            except BaseException:
+                self._discard(driver)
+                raise
+            self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    def fetch(self, url: str, provider_name: str = "BrowserPool") -> str:
+        """Loads `url` in a pooled browser and returns the page source."""
+        with self.browser(url, provider_name) as driver:
+            with provider_stats.measure(provider_name, url, "page_load"):
+                # Reset first: URLs differing only by their #fragment would
+                # otherwise not reload the page.
+                driver.get("about:blank")
+                driver.get(url)
+                return driver.page_source
+
+    def close(self):
+        """Quits every browser of the pool."""
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f"[Browser Pool] Failed to quit a browser: {e}")
+
+
+# Shared by the CSE search and the providers; see BROWSER_POOL_SIZE.
+browser_pool = BrowserPool()
+# Quit the browsers (and their geckodriver) when the server or a CLI exits.
+atexit.register(browser_pool.close)
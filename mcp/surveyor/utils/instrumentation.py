@@ -0,0 +1,172 @@
+"""
+Timing and success statistics of the surveyor providers.
+
+`Provider` reports every stage it goes through (browser start, page load,
+HTML cache hit/miss, parsing, abstract/DOI/title extraction, Semantic Scholar
+lookup). Stats are aggregated per provider class and domain, so a report
+shows which publishers are slow and which fail `get_abstract`/`get_doi` most.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlparse
+
+# Return values the providers use instead of raising when nothing was found.
+NOT_FOUND_VALUES = ("Abstract not found", "Title not found")
+# Durations kept per stage for the percentiles.
+SAMPLE_SIZE = 256
+
+
+def get_domain(url: str) -> str:
+    return urlparse(url).netloc
+
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, seconds: float, ok: bool):
+        self.count += 1
+        self.errors += 0 if ok else 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.samples.append(seconds)
+
+    def _percentile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.count, 3) if self.count else 0.0,
+            "total_ms": round(self.total_seconds * 1000, 1),
+            "mean_ms": round(self.total_seconds / self.count * 1000, 1) if self.count else 0.0,
+            "p50_ms": round(self._percentile(0.5) * 1000, 1),
+            "p95_ms": round(self._percentile(0.95) * 1000, 1),
+            "max_ms": round(self.max_seconds * 1000, 1),
+        }
+
+
+class ProviderStats:
+    """Thread-safe aggregation of stage timings per (provider, domain, stage)."""
+
+    def __init__(self):
+        self._stats: dict[tuple[str, str, str], StageStats] = {}
+        self._lock = threading.Lock()
+        self._captured: Optional[list] = None
+
+    def record(self, provider: str, domain: str, stage: str, seconds: float = 0.0, ok: bool = True):
+        with self._lock:
+            key = (provider, domain, stage)
+            if key not in self._stats:
+                self._stats[key] = StageStats()
+            self._stats[key].add(seconds, ok)
+            if self._captured is not None:
+                self._captured.append((provider, domain, stage, seconds, ok))
+
+    @contextmanager
+    def capture(self):
+        """
+        Collects the records made inside the block, so a worker process can
+        send them back to be `replay`ed in the server's stats.
+        """
+        captured: list = []
+        with self._lock:
+            self._captured = captured
+        try:
+            yield captured
+        finally:
+            with self._lock:
+                self._captured = None
+
+    def replay(self, records: list):
+        for provider, domain, stage, seconds, ok in records:
+            self.record(provider, domain, stage, seconds, ok)
+
+    @contextmanager
+    def measure(self, provider: str, url: str, stage: str):
+        """Times a block; exceptions count as failures and are re-raised."""
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.record(provider, get_domain(url), stage, time.perf_counter() - start, ok)
+
+    def report(self) -> dict:
+        """Stats grouped per provider and domain, slowest first."""
+        with self._lock:
+            items = [(key, stats.to_dict()) for key, stats in self._stats.items()]
+        grouped: dict[tuple[str, str], dict] = {}
+        for (provider, domain, stage), stats in items:
+            grouped.setdefault((provider, domain), {})[stage] = stats
+        providers = [
+            {
+                "provider": provider,
+                "domain": domain,
+                "total_ms": round(sum(s["total_ms"] for s in stages.values()), 1),
+                "stages": stages,
+            }
+            for (provider, domain), stages in grouped.items()
+        ]
+        providers.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return {"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "providers": providers}
+
+    def write_report(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+# Shared by every provider instance in the process.
+provider_stats = ProviderStats()
+
+
+def instrument_extractor(stage: str, method):
+    """
+    Wraps a provider extraction method (`get_abstract`, `get_doi`, ...) so
+    its duration and outcome are recorded. Raising or returning one of the
+    `NOT_FOUND_VALUES` counts as a failure.
+    """
+    if getattr(method, "_instrumented", False):
+        return method
+
+    def wrapper(self, *args, **kwargs):
+        # The page is fetched and parsed (lazily, see `Provider.soup`) before
+        # the timer starts: those stages are recorded on their own.
+        getattr(self, "soup", None)
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = method(self, *args, **kwargs)
+            ok = result not in NOT_FOUND_VALUES
+            return result
+        finally:
+            provider_stats.record(
+                str(self), get_domain(self.url), stage, time.perf_counter() - start, ok
+            )
+
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    wrapper._instrumented = True
+    return wrapper
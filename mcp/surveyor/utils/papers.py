@@ -0,0 +1,38 @@
+"""
+Paper identity, shared by the survey export and the federated search.
+
+Kept free of heavy imports (no pyarrow, no NumPy) so the federated search
+tool can use it.
+"""
+import re
+from typing import Optional
+
+DOI_RE = re.compile(r"10\.\d{4,9}/[^\s?#]+", re.IGNORECASE)
+WORD_RE = re.compile(r"\w+")
+
+
+def normalise_doi(value: Optional[str]) -> Optional[str]:
+    """The DOI found in `value` (a DOI, a doi.org or publisher URL), lowercased."""
+    if not value:
+        return None
+    match = DOI_RE.search(value)
+    return match.group(0).rstrip("/.").lower() if match else None
+
+
+def paper_keys(paper: dict, with_title: bool = False) -> list[str]:
+    """
+    Identities of a paper, strongest first: DOI, corpusId, URL. With
+    `with_title`, a paper with none of them is identified by its title.
+    Accepts both survey rows (`corpus_id`) and API-style records (`corpusId`).
+    """
+    keys = []
+    corpus_id = paper.get("corpus_id") or paper.get("corpusId")
+    if paper.get("doi"):
+        keys.append(f"doi:{paper['doi']}")
+    if corpus_id:
+        keys.append(f"corpus:{corpus_id}")
+    if paper.get("url"):
+        keys.append(f"url:{paper['url'].lower().rstrip('/')}")
+    if not keys and with_title and paper.get("title"):
+        keys.append(f"title:{' '.join(WORD_RE.findall(paper['title'].lower()))}")
+    return keys
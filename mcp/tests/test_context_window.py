@@ -0,0 +1,37 @@
+from google.genai import types
+
+from context_window import ContextWindow, to_dict
+
+SIGNATURE = bytes(range(250, 256)) + b"\x12\xfb\xff>?"
+
+
+def function_call_turn(prompt: str, result) -> list:
+    """A user prompt, the model's function call (as `call_gemini_api` returns it) and the tool result."""
+    response = types.GenerateContentResponse(candidates=[types.Candidate(content=types.Content(
+        role="model",
+        parts=[types.Part(
+            function_call=types.FunctionCall(name="lookup", args={"q": prompt}),
+            thought_signature=SIGNATURE,
+        )],
+    ))])
+    return [
+        {"role": "user", "parts": [{"text": prompt}]},
+        response.model_dump()["candidates"][0]["content"],
+        {"role": "tool", "parts": [types.Part.from_function_response(name="lookup", response={"result": result})]},
+    ]
+
+
+def test_to_dict_round_trips_thought_signature():
+    model_content = function_call_turn("hi", "ok")[1]
+    content = types.Content.model_validate(to_dict(model_content))
+    assert content.parts[0].thought_signature == SIGNATURE
+
+
+def test_fit_output_round_trips_through_sdk():
+    contents = function_call_turn("first", ["x" * 200] * 50) + function_call_turn("second", "ok")
+    window = ContextWindow(token_budget=1500, keep_recent_turns=1)
+    fitted, stats = window.fit(contents)
+    assert stats["compacted_turns"] == 1
+    validated = [types.Content.model_validate(content) for content in fitted]
+    signatures = [c.parts[0].thought_signature for c in validated if c.role == "model"]
+    assert signatures == [SIGNATURE, SIGNATURE]
@@ -0,0 +1,254 @@
+"""
+Request tracing and Prometheus-style metrics for the chat pipeline.
+
+A trace is started per chat request; each stage (understand call, tool
+execution, synthesize call) runs inside a `span`. Spans record their
+duration and attributes (token counts, cache hits, ...), feed the
+`chat_stage_duration_seconds` histogram, and the finished trace is logged as
+one JSON line on the `mcp.trace` logger.
+
+`render_metrics()` returns every metric in the Prometheus text exposition
+format, served by the routers at `/metrics`. No external dependency: the
+metrics are a few counters and histograms kept in memory per process.
+"""
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+logger = logging.getLogger("mcp.trace")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape_label(value) -> str:
+    """Escapes a label value for the text exposition format (backslash, quote, newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple, extra: Optional[tuple] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., sum, count]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in self._values.items():
+                for bound, count in zip(self.buckets, state):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', bound))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {state[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {state[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args)
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+stage_duration = metrics.histogram(
+    "chat_stage_duration_seconds", "Duration of chat pipeline stages.")
+request_duration = metrics.histogram(
+    "chat_request_duration_seconds", "End-to-end duration of chat requests.")
+requests_total = metrics.counter(
+    "chat_requests_total", "Chat requests by outcome.")
+gemini_tokens = metrics.counter(
+    "gemini_tokens_total", "Gemini tokens by kind (prompt, output, cached).")
+cache_events = metrics.counter(
+    "cache_events_total", "Cache lookups by cache and result.")
+
+
+def render_metrics() -> str:
+    return metrics.render()
+
+
+class Span:
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+
+    def to_dict(self, trace_start: float) -> dict:
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - trace_start) * 1000, 2),
+            "duration_ms": round((self.duration or 0) * 1000, 2),
+            **self.attributes,
+        }
+
+
+class Trace:
+    def __init__(self, name: str, **attributes):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.spans: list[Span] = []
+
+    def summary(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 2),
+            **self.attributes,
+            "spans": [span.to_dict(self.start) for span in self.spans],
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace(name: str, **attributes):
+    """Traces one request; yields the `Trace` and logs it when done."""
+    current = Trace(name, **attributes)
+    token = _current_trace.set(current)
+    outcome = "ok"
+    try:
+        yield current
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        _current_trace.reset(token)
+        elapsed = time.perf_counter() - current.start
+        current.attributes.setdefault("outcome", outcome)
+        request_duration.observe(elapsed, route=name)
+        requests_total.inc(route=name, outcome=current.attributes["outcome"])
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(current.summary(), default=str))
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Times one stage: feeds the `chat_stage_duration_seconds` histogram and,
+    inside a trace, is added to the trace's spans.
+    """
+    current = Span(name, dict(attributes))
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        current.duration = time.perf_counter() - current.start
+        labels = {"stage": name}
+        if "tool" in current.attributes:
+            labels["tool"] = current.attributes["tool"]
+        stage_duration.observe(current.duration, **labels)
+        parent = _current_trace.get()
+        if parent is not None:
+            parent.spans.append(current)
+
+
+def annotate(**attributes):
+    """Adds attributes to the innermost open span (or the trace)."""
+    target = _current_span.get() or _current_trace.get()
+    if target is not None:
+        target.attributes.update(attributes)
+
+
+def record_cache(cache: str, hit: bool, **attributes):
+    """Counts a cache lookup and tags the current span with it."""
+    result = "hit" if hit else "miss"
+    cache_events.inc(cache=cache, result=result)
+    annotate(**{f"{cache}_cache": result}, **attributes)
+
+
+def record_tokens(usage: Optional[dict]):
+    """Counts Gemini token usage (`usage_metadata`) and tags the current span."""
+    if not usage:
+        return
+    counts = {
+        "prompt": usage.get("prompt_token_count") or 0,
+        "output": usage.get("candidates_token_count") or 0,
+        "cached": usage.get("cached_content_token_count") or 0,
+    }
+    for kind, value in counts.items():
+        if value:
+            gemini_tokens.inc(value, kind=kind)
+    annotate(**{f"{kind}_tokens": value for kind, value in counts.items()})
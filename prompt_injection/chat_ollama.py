@@ -1,24 +1,40 @@
+import sys
 import json
-import base64
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import ollama
 
+from jsonl_log import JsonlWriter, BUFFER_LINES, MAX_BYTES, encode, read_log
+
 MODEL = "gemma3:4b"
+# How long Ollama keeps the model loaded between requests of a sweep.
+KEEP_ALIVE = "10m"
 
 
 class Log:
-    def __init__(self, file_path):
+    """
+    JSONL log of a sweep. Lines are buffered and flushed in batches, and the
+    file rotates (optionally zstd-compressed) past `max_bytes`; see
+    `jsonl_log.JsonlWriter`.
+    """
+
+    def __init__(self, file_path, buffer_lines=BUFFER_LINES, max_bytes=MAX_BYTES, compress=False):
         self.file_path = file_path
+        self.writer = JsonlWriter(file_path, buffer_lines=buffer_lines,
+                                  max_bytes=max_bytes, compress=compress)
 
     def __enter__(self):
-        self.fp = open(self.file_path, "a")
+        self.fp = self.writer.open()
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.fp.close()
+        self.writer.close()
 
     def open(self):
         if not hasattr(self, "fp"):
-            self.fp = open(self.file_path, "a")
+            self.fp = self.writer.open()
         return self.fp
 
     def write(self, message):
@@ -26,33 +42,131 @@ class Log:
             raise RuntimeError(
                 "Log file is not open. Use 'with Log(file_path) as log:' to open it."
             )
-        self.fp.write(message + "\n")
-        self.fp.flush()
+        self.writer.write_line(message)
 
     def record_interaction(self, question, answer):
+        # The answer is only stored base64-encoded; decode it with `jsonl_log.read_log`.
         interaction = {
-            "question": base64.b64encode(question.encode("utf-8")).decode("utf-8"),
-            "answer": base64.b64encode(answer.encode("utf-8")).decode("utf-8"),
-            "raw": answer,
+            "question": encode(question),
+            "answer": encode(answer),
         }
-        self.write(json.dumps(interaction))
+        self.write(json.dumps(interaction, separators=(",", ":")))
+
+
+_client = None
+_client_lock = threading.Lock()
+
 
+def get_client(host=None):
+    """One shared client, so every worker reuses the same pooled connections."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ollama.Client(host=host)
+        return _client
 
-def generate_answer(question):
+
+def generate_answer(question, model=MODEL, keep_alive=KEEP_ALIVE):
     try:
-        response = ollama.generate(MODEL, question)
+        response = get_client().generate(model, question, keep_alive=keep_alive)
         answer = response["response"]
         return answer
     except Exception as e:
         raise RuntimeError(f"Error generating answer: {e}")
 
 
-# for i in range(255):
-try:
-    with Log("chat_log.jsonl") as log:
-        question = f"{' '.join([chr(i) for i in range(255)])}"
-        answer = generate_answer(question)
-        log.record_interaction(question, answer)
-except Exception as e:
-    with Log("chat_log.exp") as log:
-        log.write(f"Error processing question : {e}")
+def character_prompts(start, end):
+    """One prompt per character code in [start, end)."""
+    return [chr(i) for i in range(start, end)]
+
+
+def load_prompts(path):
+    """
+    Reads a prompt set: one prompt per line, either a JSON object with a
+    "prompt" key (needed for prompts containing newlines or control
+    characters) or plain text.
+    """
+    prompts = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            prompts.append(record["prompt"] if isinstance(record, dict) else line)
+    return prompts
+
+
+def completed_questions(log_path):
+    """Questions already answered in the log, so a new run resumes after them."""
+    return {record.question for record in read_log(log_path)}
+
+
+def run_batch(prompts, log_path="chat_log.jsonl", error_path="chat_log.exp",
+              concurrency=4, model=MODEL, keep_alive=KEEP_ALIVE, resume=True, compress=False):
+    """
+    Sends `prompts` to Ollama with at most `concurrency` requests in flight.
+    Each answer is appended to the log as soon as it arrives; failures go to
+    `error_path` and are retried by the next run.
+
+    Ollama only answers requests in parallel up to its OLLAMA_NUM_PARALLEL;
+    above that they queue on the server.
+    """
+    done = completed_questions(log_path) if resume else set()
+    pending = [prompt for prompt in dict.fromkeys(prompts) if prompt not in done]
+    print(f"[Batch] {len(prompts)} prompts, {len(prompts) - len(pending)} already in {log_path}, "
+          f"{len(pending)} to run with concurrency {concurrency}.")
+
+    answered = failed = 0
+    with Log(log_path, compress=compress) as log, Log(error_path, buffer_lines=1) as errors, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(generate_answer, prompt, model, keep_alive): prompt for prompt in pending}
+        for future in as_completed(futures):
+            question = futures[future]
+            try:
+                answer = future.result()
+            except Exception as e:
+                failed += 1
+                errors.write(f"Error processing question {question!r}: {e}")
+                continue
+            log.record_interaction(question, answer)
+            answered += 1
+            if answered % 10 == 0:
+                print(f"[Batch] {answered}/{len(pending)} answered, {failed} failed.")
+
+    print(f"[Batch] Done: {answered} answered, {failed} failed.")
+    return answered, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send a prompt set to a local Ollama and log the answers.")
+    parser.add_argument("--prompts", help="Prompt file (JSONL with a 'prompt' key, or one prompt per line).")
+    parser.add_argument("--range", default="0:255",
+                        help="Character-code sweep START:END, used without --prompts.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight.")
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--host", help="Ollama (or stand-in) URL, default OLLAMA_HOST or localhost:11434.")
+    parser.add_argument("--keep-alive", default=KEEP_ALIVE, help="How long Ollama keeps the model loaded.")
+    parser.add_argument("--log", default="chat_log.jsonl")
+    parser.add_argument("--compress", action="store_true", help="zstd-compress rotated log segments.")
+    parser.add_argument("--no-resume", action="store_true", help="Ask again prompts already in the log.")
+    args = parser.parse_args(argv)
+
+    if args.prompts:
+        prompts = load_prompts(args.prompts)
+    else:
+        start, end = (int(value) for value in args.range.split(":"))
+        prompts = character_prompts(start, end)
+
+    get_client(args.host)
+    _, failed = run_batch(prompts, log_path=args.log, concurrency=args.concurrency,
+                          model=args.model, keep_alive=args.keep_alive, resume=not args.no_resume,
+                          compress=args.compress)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
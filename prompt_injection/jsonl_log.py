@@ -0,0 +1,188 @@
+"""
+Buffered, rotating JSONL log files and a streaming reader for them.
+
+The active file is always plain `chat_log.jsonl`. Once it grows past
+`max_bytes` it is closed and renamed to the next segment
+(`chat_log.jsonl.1`, `.2`, ...), compressed to `chat_log.jsonl.N.zst` when
+`compress=True` and the `zstandard` package is installed. Only closed
+segments are compressed, so an interrupted run never leaves a broken frame.
+
+Records use the compact schema `{"question": b64, "answer": b64}`. Older
+records that also carry the decoded `raw` answer are still read.
+"""
+import io
+import os
+import re
+import json
+import time
+import base64
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+BUFFER_LINES = 64
+FLUSH_INTERVAL = 1.0
+MAX_BYTES = 64 * 1024 * 1024
+
+
+def encode(text):
+    return base64.b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def decode(value):
+    return base64.b64decode(value).decode("utf-8", errors="replace")
+
+
+class JsonlWriter:
+    """
+    Appends lines to `path`, flushing every `buffer_lines` lines or
+    `flush_interval` seconds (checked on write) and on close. A crash loses
+    at most the unflushed buffer.
+    """
+
+    def __init__(self, path, buffer_lines=BUFFER_LINES, flush_interval=FLUSH_INTERVAL,
+                 max_bytes=MAX_BYTES, compress=False):
+        self.path = path
+        self.buffer_lines = buffer_lines
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.compress = compress
+        if compress and zstandard is None:
+            print("[Log] zstandard is not installed: rotated segments are kept uncompressed.")
+            self.compress = False
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._fp = None
+        self._size = 0
+
+    def open(self):
+        if self._fp is None:
+            self._fp = open(self.path, "a", encoding="utf-8")
+            self._size = self._fp.tell()
+        return self
+
+    def write_line(self, line):
+        with self._lock:
+            self._buffer.append(line + "\n")
+            if (len(self._buffer) >= self.buffer_lines
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        data = "".join(self._buffer)
+        self._buffer.clear()
+        self._fp.write(data)
+        self._fp.flush()
+        self._size += len(data.encode("utf-8"))
+        if self.max_bytes and self._size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._fp.close()
+        segment = f"{self.path}.{next_segment_number(self.path)}"
+        os.replace(self.path, segment)
+        if self.compress:
+            compressor = zstandard.ZstdCompressor(level=3)
+            with open(segment, "rb") as source, open(segment + ".zst", "wb") as target:
+                compressor.copy_stream(source, target)
+            os.remove(segment)
+        self._fp = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def close(self):
+        with self._lock:
+            if self._fp is not None:
+                self._flush()
+                self._fp.close()
+                self._fp = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _segments(path):
+    """(number, file name) of the rotated segments of `path`."""
+    directory = os.path.dirname(path) or "."
+    pattern = re.compile(re.escape(os.path.basename(path)) + r"\.(\d+)(\.zst)?$")
+    found = []
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(found)
+
+
+def next_segment_number(path):
+    segments = _segments(path)
+    return segments[-1][0] + 1 if segments else 1
+
+
+def log_files(path):
+    """Segments of `path` oldest first, then the active file."""
+    files = [name for _, name in _segments(path)]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def _open_text(path):
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+class LogRecord:
+    """A logged interaction; the base64 fields are only decoded when read."""
+
+    __slots__ = ("question_b64", "answer_b64", "_question", "_answer")
+
+    def __init__(self, question_b64, answer_b64):
+        self.question_b64 = question_b64
+        self.answer_b64 = answer_b64
+        self._question = None
+        self._answer = None
+
+    @property
+    def question(self):
+        if self._question is None:
+            self._question = decode(self.question_b64)
+        return self._question
+
+    @property
+    def answer(self):
+        if self._answer is None:
+            self._answer = decode(self.answer_b64)
+        return self._answer
+
+
+def read_log(path):
+    """
+    Yields a `LogRecord` per line of `path` and its rotated segments, one
+    line at a time. Malformed lines (e.g. cut short by an interrupted run)
+    are skipped.
+    """
+    for file_path in log_files(path):
+        with _open_text(file_path) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    yield LogRecord(record["question"], record["answer"])
+                except (ValueError, KeyError, TypeError):
+                    continue